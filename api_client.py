@@ -0,0 +1,104 @@
+# api_client.py
+# The slice of redis_db that projectMain uses, answered by api_server over HTTP.
+# Responses are kept with their ETag and revalidated, so an unchanged page costs a 304.
+import threading
+from collections import OrderedDict
+from urllib.parse import quote
+
+import requests
+
+from records import AnimeRecord
+from storage import COLD_FIELDS
+
+CACHE_SIZE = 256
+TIMEOUT = 10
+
+
+class RemoteCatalogue:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.http = requests.Session()   # keeps connections alive; requests asks for gzip by default
+        self.etags = OrderedDict()       # url + params -> (etag, decoded JSON)
+        self.lock = threading.Lock()
+
+    def _get(self, path, params=None):
+        url = self.base_url + path
+        key = (url, tuple(sorted((params or {}).items())))
+        with self.lock:
+            cached = self.etags.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        resp = self.http.get(url, params=params, headers=headers, timeout=TIMEOUT)
+        if resp.status_code == 304 and cached:
+            return cached[1]
+        resp.raise_for_status()
+        data = resp.json()
+        if resp.headers.get("ETag"):
+            with self.lock:
+                self.etags[key] = (resp.headers["ETag"], data)
+                self.etags.move_to_end(key)
+                while len(self.etags) > CACHE_SIZE:
+                    self.etags.popitem(last=False)
+        return data
+
+    def _send(self, method, path, body=None):
+        resp = self.http.request(method, self.base_url + path, json=body, timeout=TIMEOUT)
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+        return resp.json()
+
+    def search_page(self, query="", genre="", year_from=None, year_to=None, fulltext=False,
+                    offset=0, limit=20, sort_by="title", ranges=None):
+        params = {"query": query, "genre": genre, "sort_by": sort_by, "offset": offset, "limit": limit}
+        if year_from:
+            params["year_from"] = year_from
+        if year_to:
+            params["year_to"] = year_to
+        if fulltext:
+            params["fulltext"] = 1
+        for field, (low, high) in (ranges or {}).items():
+            if low is not None:
+                params[f"{field}_min"] = low
+            if high is not None:
+                params[f"{field}_max"] = high
+        # The server caps a page at its MAX_LIMIT, so big requests are assembled from several
+        items, total = [], 0
+        while True:
+            data = self._get("/anime", {**params, "offset": offset + len(items), "limit": limit - len(items)})
+            items += [AnimeRecord(**a) for a in data["items"]]
+            total = data["total"]
+            if not data["items"] or len(items) >= min(limit, total - offset):
+                return items, total
+
+    def get_anime(self, key):
+        data = self._send("GET", f"/anime/{quote(key, safe='')}")
+        return AnimeRecord(**data) if data else None
+
+    def get_details(self, key):
+        data = self._send("GET", f"/anime/{quote(key, safe='')}")
+        return {field: data.get(field, "") for field in COLD_FIELDS} if data else {}
+
+    def get_for_update(self, key):
+        data = self._send("GET", f"/anime/{quote(key, safe='')}")
+        return (AnimeRecord(**data), data["version"]) if data else (None, None)
+
+    def get_distinct_genres(self):
+        return self._get("/genres")["genres"]
+
+    def catalogue_version(self):
+        return self._get("/version")["version"]
+
+    def update_anime(self, key, data):
+        return self._send("PATCH", f"/anime/{quote(key, safe='')}", data) is not None
+
+    def update_many(self, patches, expected_version=None):
+        body = {"patches": [{"id": key, "fields": fields, **({"expected_version": rest[0]} if rest else {})}
+                            for key, fields, *rest in patches],
+                "expected_version": expected_version}
+        return self._send("PATCH", "/anime", body)["outcomes"]
+
+    def delete_anime(self, anime_id):
+        return self._send("DELETE", f"/anime/{quote(anime_id, safe='')}") is not None
+
+    def remove_genre(self, selected_genre):
+        return self._send("DELETE", f"/genres/{quote(selected_genre, safe='')}")["affected"]
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# api_server.py
+# Async HTTP/JSON front end to redis_db. Every client shares this process's warm
+# catalogue cache instead of loading its own copy from Redis.
+#
+#   python api_server.py --port 8080
+#   ANIME_API_URL=http://127.0.0.1:8080 python projectMain.py
+#
+#   GET    /anime?query=&genre=&year_from=&year_to=&fulltext=&sort_by=&offset=&limit=
+#          (plus score_min/score_max, episodes_min/..., duration_min/... ranges)
+#   GET    /anime/<id>        PATCH /anime/<id> {field: value}        DELETE /anime/<id>
+#   PATCH  /anime {"patches": [{"id", "fields", "expected_version"?}], "expected_version"?}
+#   GET    /genres            DELETE /genres/<name>
+#   GET    /version           GET /health
+#
+# GETs carry an ETag and honour If-None-Match; bodies are gzipped when the client accepts it.
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import columnar
+import redis_db
+import redis_pool
+
+HOST = "127.0.0.1"
+PORT = 8080
+VERSION_TTL = 0.25          # seconds a catalogue version check is trusted for, across all requests
+RESPONSE_CACHE_SIZE = 1024  # encoded GET responses kept per catalogue version
+GZIP_MIN_BYTES = 1024
+MAX_LIMIT = 200
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+IDLE_TIMEOUT = 15.0
+WORKERS = 32                # threads running redis_db calls; each holds at most one pooled connection
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def anime_key(anime_id):
+    anime_id = unquote(anime_id)
+    return anime_id if anime_id.startswith("anime:") else f"anime:{anime_id}"
+
+
+def to_json(anime):
+    return {name: list(value) if name == "genres" else value for name, value in anime.items()}
+
+
+def _int_arg(args, name, default=None):
+    value = args.get(name, "")
+    if value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPError(400, f"{name} must be an integer")
+
+
+def _float_arg(args, name):
+    value = args.get(name, "")
+    if value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise HTTPError(400, f"{name} must be a number")
+
+
+def search_params(args):
+    """search_page keyword arguments from the query string"""
+    sort_by = args.get("sort_by") or "title"
+    if sort_by not in redis_db.SORT_FIELDS:
+        raise HTTPError(400, f"sort_by must be one of {', '.join(redis_db.SORT_FIELDS)}")
+    ranges = {}
+    for field in columnar.RANGE_FIELDS:
+        low, high = _float_arg(args, f"{field}_min"), _float_arg(args, f"{field}_max")
+        if low is not None or high is not None:
+            ranges[field] = (low, high)
+    return dict(
+        query=args.get("query", ""),
+        genre=args.get("genre", ""),
+        year_from=_int_arg(args, "year_from"),
+        year_to=_int_arg(args, "year_to"),
+        fulltext=args.get("fulltext", "").lower() in ("1", "true", "yes"),
+        sort_by=sort_by,
+        ranges=ranges or None,
+        offset=max(0, _int_arg(args, "offset", 0)),
+        limit=min(MAX_LIMIT, max(1, _int_arg(args, "limit", 20))),
+    )
+
+
+class CatalogueService:
+    """
+    Routes requests onto redis_db, which runs on worker threads (asyncio.to_thread)
+    and shares one connection pool and one catalogue cache between all of them.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.version_checked = 0.0
+        self.version_lock = asyncio.Lock()
+        self.responses = OrderedDict()   # request target -> (version, etag, body, gzipped body or None)
+
+    async def current_version(self):
+        """Catalogue version, checked against Redis at most once per VERSION_TTL however many requests ask"""
+        async with self.version_lock:
+            if self.version is None or time.monotonic() - self.version_checked > VERSION_TTL:
+                self.version = await asyncio.to_thread(redis_db.catalogue_version)
+                self.version_checked = time.monotonic()
+            return self.version
+
+    def wrote(self):
+        """Our own write moved the catalogue on: check the version on the next read"""
+        self.version = None
+
+    # ----------------- Handlers -----------------
+    async def search(self, args):
+        items, total = await asyncio.to_thread(redis_db.search_page, **search_params(args))
+        return {"items": [to_json(a) for a in items], "total": total}
+
+    async def get(self, args, anime_id):
+        anime, version = await asyncio.to_thread(redis_db.get_for_update, anime_key(anime_id))
+        if anime is None:
+            raise HTTPError(404, "no such anime")
+        return {**to_json(anime), "version": version}
+
+    async def update(self, body, anime_id):
+        if not isinstance(body, dict):
+            raise HTTPError(400, "expected a JSON object of fields")
+        key = anime_key(anime_id)
+        updated = await asyncio.to_thread(redis_db.update_anime, key, body)
+        self.wrote()
+        if not updated:
+            raise HTTPError(404, "no such anime")
+        return to_json(await asyncio.to_thread(redis_db.get_anime, key, True))
+
+    async def update_many(self, body):
+        patches = body.get("patches") if isinstance(body, dict) else None
+        if not isinstance(patches, list) or not all(
+                isinstance(p, dict) and isinstance(p.get("id"), str) and isinstance(p.get("fields"), dict)
+                for p in patches):
+            raise HTTPError(400, 'expected {"patches": [{"id": ..., "fields": {...}}, ...]}')
+        patches = [(anime_key(p["id"]), p["fields"]) + ((p["expected_version"],) if "expected_version" in p else ())
+                   for p in patches]
+        outcomes = await asyncio.to_thread(redis_db.update_many, patches, body.get("expected_version"))
+        self.wrote()
+        return {"outcomes": outcomes}
+
+    async def delete(self, body, anime_id):
+        deleted = await asyncio.to_thread(redis_db.delete_anime, anime_key(anime_id))
+        self.wrote()
+        if not deleted:
+            raise HTTPError(404, "no such anime")
+        return {"deleted": anime_key(anime_id)}
+
+    async def genres(self, args):
+        return {"genres": sorted(await asyncio.to_thread(redis_db.get_distinct_genres))}
+
+    async def remove_genre(self, body, genre):
+        affected = await asyncio.to_thread(redis_db.remove_genre, unquote(genre))
+        self.wrote()
+        return {"affected": affected}
+
+    async def catalogue_version(self, args):
+        return {"version": await self.current_version()}
+
+    async def health(self, args):
+        return await asyncio.to_thread(redis_pool.health_check)
+
+    ROUTES = [
+        ("GET", re.compile(r"/anime"), search),
+        ("GET", re.compile(r"/anime/([^/]+)"), get),
+        ("PATCH", re.compile(r"/anime"), update_many),
+        ("PATCH", re.compile(r"/anime/([^/]+)"), update),
+        ("DELETE", re.compile(r"/anime/([^/]+)"), delete),
+        ("GET", re.compile(r"/genres"), genres),
+        ("DELETE", re.compile(r"/genres/([^/]+)"), remove_genre),
+        ("GET", re.compile(r"/version"), catalogue_version),
+        ("GET", re.compile(r"/health"), health),
+    ]
+
+    def route(self, method, path):
+        allowed = False
+        for route_method, pattern, handler in self.ROUTES:
+            match = pattern.fullmatch(path)
+            if match:
+                if route_method == method:
+                    return handler, match.groups()
+                allowed = True
+        raise HTTPError(405 if allowed else 404, "method not allowed" if allowed else "not found")
+
+    async def respond(self, method, target, headers, body):
+        """Returns (status, extra headers, body bytes)"""
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        handler, groups = self.route(method, path)
+        gzip_ok = "gzip" in headers.get("accept-encoding", "")
+
+        # Writes, and health checks that must reach Redis every time
+        if method != "GET" or handler is CatalogueService.health:
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                raise HTTPError(400, "body is not valid JSON")
+            data = json.dumps(await handler(self, payload, *groups)).encode("utf-8")
+            return 200, {"Content-Type": "application/json"}, data
+
+        # Reads are cached per catalogue version, already encoded and compressed
+        version = await self.current_version()
+        entry = self.responses.get(target)
+        if entry is None or entry[0] != version:
+            args = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            data = json.dumps(await handler(self, args, *groups)).encode("utf-8")
+            etag = f'"{version}-{hashlib.sha1(data).hexdigest()[:16]}"'
+            gzipped = gzip.compress(data, compresslevel=5) if len(data) >= GZIP_MIN_BYTES else None
+            entry = (version, etag, data, gzipped)
+            self.responses[target] = entry
+            while len(self.responses) > RESPONSE_CACHE_SIZE:
+                self.responses.popitem(last=False)
+        else:
+            self.responses.move_to_end(target)
+        _, etag, data, gzipped = entry
+
+        extra = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if etag in (t.strip() for t in headers.get("if-none-match", "").split(",")):
+            return 304, extra, b""
+        extra["Content-Type"] = "application/json"
+        if gzipped is not None and gzip_ok:
+            extra["Content-Encoding"] = "gzip"
+            return 200, extra, gzipped
+        return 200, extra, data
+
+    # ----------------- HTTP/1.1 -----------------
+    async def serve_connection(self, reader, writer):
+        """One client connection; requests are answered in order while it stays alive"""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, asyncio.LimitOverrunError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" or (version == "HTTP/1.1" and connection != "close")
+
+                length = int(headers.get("content-length") or 0)
+                try:
+                    if length > MAX_BODY_BYTES:
+                        raise HTTPError(413, "body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    status, extra, data = await self.respond(method, target, headers, body)
+                except HTTPError as e:
+                    status, extra = e.status, {"Content-Type": "application/json"}
+                    data = json.dumps({"error": str(e)}).encode("utf-8")
+                except asyncio.IncompleteReadError:
+                    return
+                except Exception as e:
+                    print(f"❌ {method} {target} failed: {e}")
+                    status, extra = 500, {"Content-Type": "application/json"}
+                    data = json.dumps({"error": "internal error"}).encode("utf-8")
+
+                out = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                       f"Content-Length: {len(data)}",
+                       f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                out += [f"{name}: {value}" for name, value in extra.items()]
+                writer.write(("\r\n".join(out) + "\r\n\r\n").encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host=HOST, port=PORT):
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(WORKERS, thread_name_prefix="api"))
+    service = CatalogueService()
+    # Warm the catalogue (and the columnar snapshot) before taking traffic
+    await asyncio.to_thread(redis_db.search_page, limit=1)
+    server = await asyncio.start_server(service.serve_connection, host, port, limit=MAX_HEADER_BYTES, backlog=1024)
+    print(f"🚀 Anime API listening on http://{host}:{server.sockets[0].getsockname()[1]}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP/JSON API over the anime catalogue")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,642 @@
+#!/usr/bin/env python3
+# bench.py
+# Micro-benchmarks for the data layer. Needs no Redis server.
+#
+#   python bench.py records --n 50000
+#   python bench.py columnar --n 100000
+#   python bench.py suite --sizes 1000,10000 --out bench.json --compare last.json
+#   python bench.py storage --n 10000
+#   python bench.py snapshot --n 10000
+#   python bench.py startup --runs 5 --gui --out startup.json --compare last_startup.json
+#   xvfb-run python bench.py render --pages 200
+#
+# The suite runs against fakeredis by default, or a real server with --redis
+# (e.g. redis://localhost:6379/15; that database is flushed).
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import platform
+import random
+import statistics
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import redis
+
+import columnar
+import mock_jikan
+import redis_db
+import seed
+import snapshot_file
+import storage
+from records import AnimeRecord
+from seed import build_entry
+
+try:
+    import fakeredis
+except ImportError:  # only needed when no --redis URL is given
+    fakeredis = None
+
+NO_RATE_LIMIT = ((1_000_000, 1.0),)
+HEAVY_MODULES = ("redis", "numpy", "requests")   # projectMain should load these after first paint, not before
+
+
+def synthetic_hashes(n, seed=0):
+    """n anime as the string hashes seed_anime stores, keyed like the live catalogue"""
+    rng = random.Random(seed)
+    return {f"anime:{i}": build_entry(mock_jikan.make_anime(i, rng)) for i in range(1, n + 1)}
+
+
+def measure_memory(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def timed(fn, repeat=5):
+    """Best of repeat runs, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+# The dict path, as search_anime/get_distinct_genres worked on dicts of strings
+def dict_parse(raw):
+    out = []
+    for key, data in raw.items():
+        anime = dict(data)
+        anime["genres"] = [g.strip() for g in anime["genres"].split(",") if g.strip()]
+        anime["id"] = key
+        out.append(anime)
+    return out
+
+
+def dict_search(catalogue, query, genre, year_from, year_to):
+    results = []
+    for anime in catalogue:
+        title = anime.get("title", "").lower()
+        title_en = anime.get("title_english", "").lower()
+        title_jp = anime.get("title_japanese", "").lower()
+        if query and query not in title and query not in title_en and query not in title_jp:
+            continue
+        if genre and genre not in [g.lower() for g in anime.get("genres", [])]:
+            continue
+        try:
+            anime_year = int(anime.get("year")) if anime.get("year") else None
+        except ValueError:
+            anime_year = None
+        if year_from and (anime_year is None or anime_year < year_from):
+            continue
+        if year_to and (anime_year is None or anime_year > year_to):
+            continue
+        results.append(anime)
+    results.sort(key=lambda x: x.get("title", "").lower())
+    return results
+
+
+def dict_genres(catalogue):
+    genres = set()
+    for anime in catalogue:
+        genres.update(anime.get("genres", []))
+    return sorted(genres)
+
+
+# The same operations on AnimeRecord
+def record_parse(raw):
+    return [AnimeRecord.from_hash(key, data) for key, data in raw.items()]
+
+
+def record_search(catalogue, query, genre, year_from, year_to):
+    lowered = {}  # genre names are interned, so each distinct one is lowercased once
+    results = []
+    for anime in catalogue:
+        if query and query not in "\x00".join((anime.sort_title, anime.title_english.lower(),
+                                                 anime.title_japanese.lower())):
+            continue
+        if genre and not any(lowered.setdefault(g, g.lower()) == genre for g in anime.genres):
+            continue
+        if year_from and (anime.year is None or anime.year < year_from):
+            continue
+        if year_to and (anime.year is None or anime.year > year_to):
+            continue
+        results.append(anime)
+    results.sort(key=lambda x: x.sort_title)
+    return results
+
+
+def record_genres(catalogue):
+    genres = set()
+    for anime in catalogue:
+        genres.update(anime.genres)
+    return sorted(genres)
+
+
+def bench_records(n):
+    raw = synthetic_hashes(n)
+    searches = [("naru", "", None, None), ("", "action", 2000, 2015), ("piece", "drama", 1990, None)]
+
+    dicts, dict_bytes = measure_memory(lambda: dict_parse(raw))
+    records, record_bytes = measure_memory(lambda: record_parse(raw))
+    for args in searches:
+        assert [a["id"] for a in dict_search(dicts, *args)] == [a.id for a in record_search(records, *args)]
+
+    rows = [
+        ("memory (MB)", dict_bytes / 2**20, record_bytes / 2**20),
+        ("bytes / record", dict_bytes / n, record_bytes / n),
+        ("parse (ms)", timed(lambda: dict_parse(raw), 3), timed(lambda: record_parse(raw), 3)),
+        ("search x3 (ms)", timed(lambda: [dict_search(dicts, *a) for a in searches]),
+                           timed(lambda: [record_search(records, *a) for a in searches])),
+        ("sort by title (ms)", timed(lambda: sorted(dicts, key=lambda x: x.get("title", "").lower())),
+                               timed(lambda: sorted(records, key=lambda x: x.sort_title))),
+        ("distinct genres (ms)", timed(lambda: dict_genres(dicts)), timed(lambda: record_genres(records))),
+    ]
+    print(f"{n} records")
+    print(f"{'':24}{'dict':>12}{'AnimeRecord':>14}")
+    for name, old, new in rows:
+        print(f"{name:24}{old:12.1f}{new:14.1f}")
+
+
+def bench_columnar(n):
+    if columnar.np is None:
+        raise SystemExit("NumPy is not installed")
+    records = record_parse(synthetic_hashes(n))
+    started = time.perf_counter()
+    snapshot = columnar.CatalogueSnapshot(records, version=0)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    # record_search is substring based, so compare on filters where both agree
+    searches = [("", "action", 2000, 2015), ("", "drama", 1990, None), ("", "", 1980, 1985)]
+    for query, genre, year_from, year_to in searches:
+        expected = [a.id for a in record_search(records, query, genre, year_from, year_to)]
+        mask = snapshot.mask(query, genre, year_from, year_to)
+        assert [a.id for a in snapshot.select(mask)[0]] == expected
+
+    print(f"{n} records, snapshot built in {build_ms:.0f} ms")
+    print(f"{'':30}{'record loop':>14}{'vectorized':>14}")
+    for args in searches:
+        loop = timed(lambda: record_search(records, *args))
+        vec = timed(lambda: snapshot.mask(*args), 20)
+        print(f"{str(args):30}{loop:14.2f}{vec:14.3f}")
+    for args in [("naru", "", None, None), ("sh", "", None, None)]:
+        print(f"{str(args):30}{'':>14}{timed(lambda: snapshot.mask(*args), 20):14.3f}")
+    ranges = {"score": (8, None), "episodes": (None, 26), "duration": (20, None)}
+    print(f"{'score/episodes/duration ranges':30}{'':>14}{timed(lambda: snapshot.mask(ranges=ranges), 20):14.3f}")
+
+
+# ----------------- Suite -----------------
+class RoundTrips:
+    """Counts round trips and commands sent by every redis-py client while active"""
+
+    def __init__(self):
+        self.round_trips = 0
+        self.commands = 0
+
+    @contextlib.contextmanager
+    def counting(self):
+        execute_command = redis.Redis.execute_command
+        pipeline_execute = redis.client.Pipeline.execute
+        counter = self
+
+        def counted_command(client, *args, **kwargs):
+            counter.round_trips += 1
+            counter.commands += 1
+            return execute_command(client, *args, **kwargs)
+
+        def counted_pipeline(pipe, *args, **kwargs):
+            if pipe.command_stack:
+                counter.round_trips += 1
+                counter.commands += len(pipe.command_stack)
+            return pipeline_execute(pipe, *args, **kwargs)
+
+        redis.Redis.execute_command = counted_command
+        redis.client.Pipeline.execute = counted_pipeline
+        try:
+            yield self
+        finally:
+            redis.Redis.execute_command = execute_command
+            redis.client.Pipeline.execute = pipeline_execute
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def measure(fn, runs, setup=None):
+    """
+    Latency percentiles over runs calls, then round trips, commands and peak
+    Python memory of one more call. setup runs untimed before every call.
+    An untimed first call keeps lazily built state (cache, snapshot) out of the figures.
+    """
+    if setup:
+        setup()
+    fn()
+    samples = []
+    for _ in range(runs):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    with RoundTrips().counting() as trips:
+        fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "runs": runs,
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "round_trips": trips.round_trips,
+        "commands": trips.commands,
+        "peak_mb": round(peak / 2**20, 2),
+    }
+
+
+def connect(url):
+    if url:
+        client = redis.Redis.from_url(url, decode_responses=True)
+    elif fakeredis is not None:
+        client = fakeredis.FakeRedis(decode_responses=True)
+    else:
+        raise SystemExit("Install fakeredis or pass --redis URL")
+    client.flushdb()
+    return client
+
+
+def server_memory_mb(client):
+    try:
+        return round(client.info("memory")["used_memory"] / 2**20, 2)
+    except (redis.RedisError, KeyError):
+        return None  # fakeredis keeps no such figure
+
+
+def populate(client, n, seed_value=0, page_size=500):
+    """Writes n synthetic Jikan-shaped anime through the seeder's save path, indexes included"""
+    rng = random.Random(seed_value)
+    for start in range(1, n + 1, page_size):
+        page = [mock_jikan.make_anime(mal_id, rng) for mal_id in range(start, min(start + page_size, n + 1))]
+        seed.save_page(client, page)
+
+
+def bench_operations(client, runs):
+    """Every public read/write path of redis_db against an already populated client"""
+    redis_db.use_client(client)
+    results = {}
+
+    results["get_all_anime (cold)"] = measure(redis_db.get_all_anime, max(3, runs // 4), setup=redis_db.reset_cache)
+    results["get_all_anime (warm)"] = measure(redis_db.get_all_anime, runs)
+    searches = {
+        "title": dict(query="naru"),
+        "genre+years": dict(genre="Action", year_from=2000, year_to=2015),
+        "title+genre": dict(query="sh", genre="Drama"),
+        "ranges": dict(ranges={"score": (8, None), "episodes": (None, 26)}),
+        "fulltext": dict(query="shingeki kyoujin", fulltext=True),
+    }
+    for name, params in searches.items():
+        results[f"search_anime {name}"] = measure(lambda: redis_db.search_anime(**params), runs)
+    results["search_page score, page 3"] = measure(
+        lambda: redis_db.search_page(genre="Comedy", sort_by="score", offset=40, limit=20), runs)
+    results["get_distinct_genres"] = measure(redis_db.get_distinct_genres, runs)
+
+    # Destructive, so each call strips a different genre; measure() makes two untimed ones
+    genres = iter(redis_db.get_distinct_genres())
+    results["remove_genre"] = measure(lambda: redis_db.remove_genre(next(genres)),
+                                      min(runs, len(mock_jikan.GENRES) - 2))
+    return results
+
+
+def bench_seed(client, pages, per_page, concurrency):
+    """Replays seed_anime's full and incremental runs against the mock Jikan server, unthrottled"""
+    client.flushdb()
+    server, url = mock_jikan.start_server(pages=pages, per_page=per_page)
+    out = {}
+    try:
+        for name, incremental in (("seed full", False), ("seed incremental, unchanged", True)):
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats = measure(lambda: seed.run_seed(client, url, 0, concurrency, incremental, NO_RATE_LIMIT), 1,
+                                setup=lambda: client.delete(seed.CHECKPOINT_KEY))
+            stats["anime_per_s"] = round(pages * per_page / (stats["p50_ms"] / 1000), 1)
+            out[name] = stats
+    finally:
+        server.shutdown()
+    return out
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Prints operations whose p50 grew by more than tolerance; returns how many"""
+    regressions = 0
+    for size, ops in results["sizes"].items():
+        for name, stats in ops.items():
+            old = baseline.get("sizes", {}).get(size, {}).get(name)
+            if not old or not isinstance(stats, dict) or "p50_ms" not in stats:
+                continue
+            if stats["p50_ms"] > old["p50_ms"] * (1 + tolerance) and stats["p50_ms"] - old["p50_ms"] > 0.5:
+                regressions += 1
+                print(f"⚠️ {size} {name}: p50 {old['p50_ms']} -> {stats['p50_ms']} ms")
+    return regressions
+
+
+def bench_storage(n, url):
+    """The same catalogue stored plain, then migrated to compact: size per anime and list-view load time"""
+    client = connect(url)
+    redis_db.use_client(client)
+    storage.FORMAT = "plain"
+    populate(client, n)
+    rows = {}
+    for fmt in ("plain", "compact"):
+        if fmt != "plain":
+            started = time.perf_counter()
+            redis_db.migrate_storage(fmt)
+            print(f"Migrated {n} anime to {fmt} in {time.perf_counter() - started:.1f} s")
+        report = redis_db.storage_report(n)
+        report["get_all_anime (cold)"] = measure(redis_db.get_all_anime, 3, setup=redis_db.reset_cache)
+        rows[fmt] = report
+    client.flushdb()
+
+    plain, compact = rows["plain"], rows["compact"]
+    print(f"{n} records, bytes per anime{'':10}{'plain':>10}{'compact':>10}")
+    for name in ("memory_bytes", "stored_bytes"):
+        print(f"{name:37}{str(plain[name]):>10}{str(compact[name]):>10}")
+    # Before this format a list view read whole hashes; now it reads the hot fields only
+    print(f"{'list view transfer':37}{plain['stored_bytes']:>10}{compact['list_view_bytes']:>10}")
+    print(f"{'get_all_anime cold p50 (ms)':37}{plain['get_all_anime (cold)']['p50_ms']:>10.1f}"
+          f"{compact['get_all_anime (cold)']['p50_ms']:>10.1f}")
+
+
+def bench_snapshot(n, url, runs=5, page_size=6):
+    """Cold start from the snapshot file vs a full load from Redis, and reconciling a stale file"""
+    client = connect(url)
+    redis_db.use_client(client)
+    populate(client, n)
+    path = os.path.join(tempfile.mkdtemp(), "catalogue.snapshot")
+
+    started = time.perf_counter()
+    redis_db.export_snapshot(path)
+    print(f"Exported {n} anime in {(time.perf_counter() - started) * 1000:.0f} ms, "
+          f"{os.path.getsize(path) / 2**20:.2f} MB")
+
+    def snapshot_page():
+        snapshot = snapshot_file.open_snapshot(path)
+        snapshot.page(0, page_size)
+        snapshot.close()
+
+    def snapshot_load():
+        redis_db.load_snapshot(snapshot_file.open_snapshot(path))
+
+    def snapshot_sync():
+        snapshot_load()
+        redis_db.catalogue_version()
+
+    rows = {
+        "page 1, Redis (cold cache)": measure(lambda: redis_db.search_page(limit=page_size), runs,
+                                              setup=redis_db.reset_cache),
+        "page 1, snapshot file": measure(snapshot_page, runs),
+        "whole catalogue, Redis": measure(redis_db.get_all_anime, runs, setup=redis_db.reset_cache),
+        "whole catalogue, snapshot file": measure(snapshot_load, runs, setup=redis_db.reset_cache),
+    }
+    # The file falls behind by 1% of the catalogue; loading it then only refetches those
+    for anime in random.Random(1).sample(redis_db.get_all_anime(), max(1, n // 100)):
+        redis_db.update_anime(anime["id"], {"score": "9.99"})
+    rows["snapshot + sync of 1% changed"] = measure(snapshot_sync, runs, setup=redis_db.reset_cache)
+    client.flushdb()
+    os.remove(path)
+
+    print(f"{n} records{'':30}{'p50 ms':>10}{'p95 ms':>10}{'trips':>8}{'peak MB':>10}")
+    for name, row in rows.items():
+        print(f"{name:39}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['round_trips']:>8}{row['peak_mb']:>10.1f}")
+
+
+def bench_startup(runs, gui, out, baseline, tolerance):
+    """
+    projectMain's import time in fresh interpreters, and which HEAVY_MODULES that import
+    drags in. gui=True also launches the app (needs a display and Redis) and collects its
+    own startup stages: imports, first paint, first results, synced with Redis.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    probe = ("import json, sys, time; started = time.perf_counter(); import projectMain; "
+             "print(json.dumps({'ms': (time.perf_counter() - started) * 1000, "
+             f"'heavy': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))")
+    samples = {"import projectMain": []}
+    heavy = set()
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True, cwd=here)
+        data = json.loads(proc.stdout.splitlines()[-1])
+        samples["import projectMain"].append(data["ms"])
+        heavy.update(data["heavy"])
+    if gui:
+        for _ in range(runs):
+            proc = subprocess.run([sys.executable, "projectMain.py"], capture_output=True, text=True, timeout=300,
+                                  cwd=here, env={**os.environ, "ANIME_STARTUP_EXIT": "1"})
+            line = next((l for l in proc.stdout.splitlines() if l.startswith("STARTUP ")), None)
+            if line is None:
+                raise SystemExit(f"projectMain reported no startup timings:\n{proc.stderr[-2000:]}")
+            for stage, ms in json.loads(line[len("STARTUP "):]).items():
+                samples.setdefault(f"app {stage}", []).append(ms)
+
+    rows = {name: {"runs": len(values), "p50_ms": round(percentile(values, 50), 1),
+                   "p95_ms": round(percentile(values, 95), 1)} for name, values in samples.items()}
+    print(f"{'startup stage':30}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, row in rows.items():
+        print(f"{name:30}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}")
+    results = {"commit": git_commit(), "python": platform.python_version(), "heavy_imports": sorted(heavy),
+               "sizes": {"startup": rows}}
+    if out:
+        with open(out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"📝 Wrote {out}")
+    if heavy:
+        raise SystemExit(f"importing projectMain loads {', '.join(sorted(heavy))} before first paint")
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare(results, json.load(f), tolerance)
+        if regressions:
+            raise SystemExit(f"{regressions} regression(s) against {baseline}")
+        print(f"✔️ No regressions against {baseline}")
+
+
+def bench_render(pages):
+    """
+    Page switches in projectMain's card grid: re-binding the CardWidget pool, as render_page
+    does, vs building a fresh set of cards for every page. Needs a display; xvfb-run will do.
+    Covers are left out (no image URLs), so only widget work is timed.
+    """
+    import tkinter
+    from types import SimpleNamespace
+
+    import projectMain
+    from projectMain import CARD_COLUMNS, CARD_IMAGE_SIZE, ITEMS_PER_PAGE, CardWidget, ctk
+
+    try:
+        root = ctk.CTk()
+    except tkinter.TclError as e:
+        raise SystemExit(f"render needs a display, e.g. xvfb-run python bench.py render ({e})")
+    root.geometry("1300x850")
+    placeholder = projectMain.CTkImage(projectMain.Image.new("RGB", CARD_IMAGE_SIZE, "#2B2B2B"), size=CARD_IMAGE_SIZE)
+    app = SimpleNamespace(card_placeholder=placeholder, load_image_async=lambda *args: None,
+                          open_details=lambda anime: None)
+    catalogue = [anime.replace(image="") for anime in record_parse(synthetic_hashes(ITEMS_PER_PAGE * pages))]
+    page_items = [catalogue[i:i + ITEMS_PER_PAGE] for i in range(0, len(catalogue), ITEMS_PER_PAGE)]
+    area = ctk.CTkScrollableFrame(root)
+    area.pack(fill="both", expand=True)
+    root.update()
+
+    def build_rows():
+        rows = []
+        for _ in range((ITEMS_PER_PAGE + CARD_COLUMNS - 1) // CARD_COLUMNS):
+            row = ctk.CTkFrame(area, fg_color="transparent")
+            rows.append((row, [CardWidget(row, app) for _ in range(CARD_COLUMNS)]))
+        return rows
+
+    def show(rows, items):
+        for r, (row, cards) in enumerate(rows):
+            row.pack(fill="x", pady=10, padx=10)
+            for card, anime in zip(cards, items[r * CARD_COLUMNS:(r + 1) * CARD_COLUMNS]):
+                card.bind(anime, 0)
+
+    pool = build_rows()
+    built = []
+
+    def rebuild(items):
+        for row, _ in built:
+            row.destroy()
+        built[:] = build_rows()
+        show(built, items)
+
+    rows = {}
+    for name, render in (("card pool, re-bind", lambda items: show(pool, items)),
+                         ("fresh cards per page", rebuild)):
+        samples = []
+        for items in page_items:
+            started = time.perf_counter()
+            render(items)
+            root.update_idletasks()
+            samples.append((time.perf_counter() - started) * 1000)
+        samples = samples[1:]  # the first page pays for fonts and first layout
+        rows[name] = (percentile(samples, 50), percentile(samples, 95))
+        for row, _ in pool:
+            row.pack_forget()
+    root.destroy()
+
+    print(f"{ITEMS_PER_PAGE} cards/page, {pages} pages{'':6}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, (p50, p95) in rows.items():
+        print(f"{name:32}{p50:>10.2f}{p95:>10.2f}")
+
+
+def run_suite(sizes, url, runs, seed_pages, out, baseline, tolerance):
+    client = connect(url)
+    results = {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": columnar.np is not None,
+        "backend": "redis" if url else "fakeredis",
+        "sizes": {},
+    }
+    for n in sizes:
+        client.flushdb()
+        started = time.perf_counter()
+        populate(client, n)
+        ops = {"populate_s": round(time.perf_counter() - started, 2)}
+        ops.update(bench_operations(client, runs))
+        ops["redis_used_mb"] = server_memory_mb(client)
+        results["sizes"][str(n)] = ops
+        print(f"\n{n} records (populated in {ops['populate_s']} s)")
+        print(f"{'':34}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'trips':>8}{'cmds':>9}{'peak MB':>9}")
+        for name, stats in ops.items():
+            if isinstance(stats, dict):
+                print(f"{name:34}{stats['p50_ms']:10.2f}{stats['p95_ms']:10.2f}{stats['p99_ms']:10.2f}"
+                      f"{stats['round_trips']:8}{stats['commands']:9}{stats['peak_mb']:9.1f}")
+
+    if seed_pages:
+        results["seed"] = bench_seed(client, seed_pages, 25, seed.MAX_IN_FLIGHT * 4)
+        for name, stats in results["seed"].items():
+            print(f"{name:34}{stats['p50_ms']:10.0f} ms, {stats['anime_per_s']} anime/s, "
+                  f"{stats['round_trips']} round trips")
+    client.flushdb()
+
+    if out:
+        with open(out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {out}")
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare(results, json.load(f), tolerance)
+        if regressions:
+            raise SystemExit(f"{regressions} regression(s) against {baseline}")
+        print(f"✔️ No regressions against {baseline}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Anime data layer benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    records_cmd = sub.add_parser("records", help="dicts of strings vs AnimeRecord")
+    records_cmd.add_argument("--n", type=int, default=50_000)
+    columnar_cmd = sub.add_parser("columnar", help="record-by-record filtering vs NumPy masks")
+    columnar_cmd.add_argument("--n", type=int, default=100_000)
+    storage_cmd = sub.add_parser("storage", help="plain vs compact anime hashes")
+    storage_cmd.add_argument("--n", type=int, default=10_000)
+    storage_cmd.add_argument("--redis", default="", help="Redis URL to use instead of fakeredis; its database is flushed")
+    snapshot_cmd = sub.add_parser("snapshot", help="cold start from the snapshot file vs loading from Redis")
+    snapshot_cmd.add_argument("--n", type=int, default=10_000)
+    snapshot_cmd.add_argument("--redis", default="", help="Redis URL to use instead of fakeredis; its database is flushed")
+    startup_cmd = sub.add_parser("startup", help="projectMain import time and startup stages")
+    startup_cmd.add_argument("--runs", type=int, default=5)
+    startup_cmd.add_argument("--gui", action="store_true", help="also launch the app (needs a display and Redis)")
+    startup_cmd.add_argument("--out", help="write results as JSON here")
+    startup_cmd.add_argument("--compare", help="earlier --out file; exits non-zero if a stage got slower")
+    startup_cmd.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown before it counts")
+    render_cmd = sub.add_parser("render", help="page switch in the card grid: widget pool vs fresh cards (needs a display)")
+    render_cmd.add_argument("--pages", type=int, default=200)
+    suite_cmd = sub.add_parser("suite", help="redis_db operations and seeding at several catalogue sizes")
+    suite_cmd.add_argument("--sizes", default="1000,10000", help="comma separated catalogue sizes (1k-200k)")
+    suite_cmd.add_argument("--redis", default="", help="Redis URL to use instead of fakeredis; its database is flushed")
+    suite_cmd.add_argument("--runs", type=int, default=20, help="timed calls per operation")
+    suite_cmd.add_argument("--seed-pages", type=int, default=40, help="mock Jikan pages for the seeding replay, 0 skips it")
+    suite_cmd.add_argument("--out", help="write results as JSON here")
+    suite_cmd.add_argument("--compare", help="earlier --out file; exits non-zero if an operation got slower")
+    suite_cmd.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown before it counts")
+    args = parser.parse_args()
+
+    if args.command == "records":
+        bench_records(args.n)
+    elif args.command == "columnar":
+        bench_columnar(args.n)
+    elif args.command == "storage":
+        bench_storage(args.n, args.redis)
+    elif args.command == "snapshot":
+        bench_snapshot(args.n, args.redis)
+    elif args.command == "startup":
+        bench_startup(args.runs, args.gui, args.out, args.compare, args.tolerance)
+    elif args.command == "render":
+        bench_render(args.pages)
+    elif args.command == "suite":
+        run_suite([int(n) for n in args.sizes.split(",")], args.redis, args.runs, args.seed_pages,
+                  args.out, args.compare, args.tolerance)
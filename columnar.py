@@ -0,0 +1,134 @@
+# columnar.py
+# Column-oriented snapshot of the cached catalogue. Filters run as NumPy boolean masks
+# over whole columns instead of a per-record Python loop.
+try:
+    import numpy as np
+except ImportError:  # optional: without it redis_db answers from the Redis indexes
+    np = None
+
+RANGE_FIELDS = ("year", "score", "episodes", "duration")
+SORT_FIELDS = ("title", "score", "year", "episodes")
+
+# Between titles of one anime, and between anime, in the title code points
+FIELD_SEP, RECORD_SEP = "\x00", "\n"
+
+
+def _number(value):
+    try:
+        return float(value) if value not in (None, "") else float("nan")
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _normalize_title(text):
+    return " ".join((text or "").lower().split())
+
+
+class CatalogueSnapshot:
+    """
+    Immutable columnar copy of a list of AnimeRecords, tagged with the cache version it reflects.
+    - year/score/episodes/duration: float64 columns, NaN when unknown
+    - genres: one bit per genre of the vocabulary, packed into uint64 words per record
+    - titles: every normalised title as one array of code points, plus where its words start,
+      so a title-prefix match is a handful of vectorized compares
+    - orders: record indices pre-sorted for each of SORT_FIELDS
+    """
+
+    def __init__(self, records, version):
+        self.version = version
+        self.records = list(records)
+        n = len(self.records)
+
+        self.columns = {field: np.fromiter((_number(r.get(field)) for r in self.records), np.float64, n)
+                        for field in RANGE_FIELDS}
+
+        vocabulary = sorted({g for r in self.records for g in r.genres})
+        bit_of = {g: i for i, g in enumerate(vocabulary)}
+        self.genre_words = np.zeros((n, max(1, (len(vocabulary) + 63) // 64)), np.uint64)
+        for i, r in enumerate(self.records):
+            for g in r.genres:
+                b = bit_of[g]
+                self.genre_words[i, b >> 6] |= np.uint64(1 << (b & 63))
+        # Genre filters are case insensitive, so one name may map to several bits
+        self.genre_bits = {}
+        for g, b in bit_of.items():
+            self.genre_bits.setdefault(g.lower(), []).append(b)
+
+        titles = [FIELD_SEP.join(_normalize_title(r.get(f)) for f in ("title", "title_english", "title_japanese"))
+                  for r in self.records]
+        chars = np.frombuffer(RECORD_SEP.join(titles).encode("utf-32-le"), np.uint32)
+        if not len(chars) or chars.max() < 0x10000:
+            chars = chars.astype(np.uint16)
+        self.title_chars = chars
+        lengths = np.fromiter((len(t) + 1 for t in titles), np.int64, n)
+        self.title_starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if n else np.zeros(0, np.int64)
+        separators = [ord(" "), ord(FIELD_SEP), ord(RECORD_SEP)]
+        after_separator = np.isin(np.concatenate(([ord(RECORD_SEP)], chars[:-1])), separators)
+        self.word_starts = np.flatnonzero(after_separator & ~np.isin(chars, separators))
+        self.word_start_chars = chars[self.word_starts]
+
+        sort_titles = np.array([r.sort_title for r in self.records], dtype=object)
+        by_title = np.argsort(sort_titles, kind="stable")
+        self.orders = {"title": by_title}
+        for field in SORT_FIELDS[1:]:
+            # Descending, unknown last, ties in title order
+            key = self.columns[field][by_title]
+            key = np.where(np.isnan(key), np.inf, -key)
+            self.orders[field] = by_title[np.argsort(key, kind="stable")]
+
+    def __len__(self):
+        return len(self.records)
+
+    def _title_mask(self, query):
+        """Records with a title word starting with query (any position for Japanese), like idx:title"""
+        mask = np.zeros(len(self.records), bool)
+        codes = [ord(ch) for ch in query]
+        if max(codes) > np.iinfo(self.title_chars.dtype).max:
+            return mask
+        chars = self.title_chars
+        if codes[0] > 0x2E7F:
+            positions = np.flatnonzero(chars == codes[0])
+        else:
+            positions = self.word_starts[self.word_start_chars == codes[0]]
+        # Narrow the candidates one character at a time
+        for k, code in enumerate(codes[1:], 1):
+            positions = positions[positions + k < len(chars)]
+            positions = positions[chars[positions + k] == code]
+        if len(positions):
+            mask[np.searchsorted(self.title_starts, positions, side="right") - 1] = True
+        return mask
+
+    def _genre_mask(self, genre):
+        mask = np.zeros(len(self.records), bool)
+        for b in self.genre_bits.get(genre, ()):
+            mask |= (self.genre_words[:, b >> 6] & np.uint64(1 << (b & 63))) != 0
+        return mask
+
+    def mask(self, query="", genre="", year_from=None, year_to=None, ranges=None):
+        """
+        Boolean mask of the records matching every filter.
+        ranges: {"score": (low, high), ...} over RANGE_FIELDS, either bound may be None.
+        """
+        mask = np.ones(len(self.records), bool)
+        query = _normalize_title(query)
+        if query:
+            mask &= self._title_mask(query)
+        if genre:
+            mask &= self._genre_mask(genre.lower())
+        if year_from:
+            mask &= self.columns["year"] >= year_from
+        if year_to:
+            mask &= self.columns["year"] <= year_to
+        for field, (low, high) in (ranges or {}).items():
+            if low is not None:
+                mask &= self.columns[field] >= low
+            if high is not None:
+                mask &= self.columns[field] <= high
+        return mask
+
+    def select(self, mask, sort_by="title", offset=0, limit=None):
+        """Returns (matching records in sort_by order, sliced to offset/limit, total matches)"""
+        order = self.orders[sort_by]
+        hits = order[mask[order]]
+        page = hits[offset:offset + limit] if limit is not None else hits[offset:]
+        return [self.records[i] for i in page], len(hits)
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# image_store.py
+# Cover images on disk, shared by the GUI and the warm-up command.
+#
+#   <root>/<first 2 hex>/<sha256 of url>.orig          the downloaded bytes, as served
+#   <root>/<first 2 hex>/<sha256 of url>.<W>x<H>.jpg   resized variants (card, detail, ...)
+#   <root>/index.json                                  url, bytes on disk and last use per hash
+#
+# Files are written to a temp file and renamed into place, so a reader never sees half of one.
+# Covers the app cached before the store (<root>/<url basename>) are deleted when it first opens.
+# Once the store holds more than ANIME_IMAGE_CACHE_MB, least recently used covers go first.
+#
+#   python image_store.py warm --workers 16
+import atexit
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+
+import requests
+from PIL import Image
+
+import metrics
+
+ROOT = os.environ.get("ANIME_IMAGE_DIR", "images_cache")
+MAX_BYTES = int(float(os.environ.get("ANIME_IMAGE_CACHE_MB") or 512) * 2**20)
+LOW_WATER = 0.9             # eviction trims the store to this share of MAX_BYTES
+INDEX_SAVE_SECONDS = 5.0    # the index is written at most this often (and on flush)
+VARIANT_QUALITY = 90
+VARIANTS = {"card": (280, 400), "detail": (440, 620)}
+WARM_WORKERS = 16
+TIMEOUT = 8
+URL_LOCKS = 64              # striped locks, so two threads never fetch or resize the same cover at once
+
+
+def url_hash(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class ImageStore:
+    """Thread-safe; one per process is enough"""
+
+    def __init__(self, root=ROOT, max_bytes=MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(root, "index.json")
+        self.http = requests.Session()
+        self.lock = threading.Lock()
+        self.url_locks = [threading.Lock() for _ in range(URL_LOCKS)]
+        self.index = {}              # hash -> {"url", "bytes", "used"}
+        self.bytes = 0
+        self.dirty = False
+        self.saved_at = 0.0
+        os.makedirs(root, exist_ok=True)
+        self._load_index()
+
+    # ----------------- Index -----------------
+    def _load_index(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self._drop_legacy()
+            self.index = self._scan()
+            self.dirty = True
+        self.bytes = sum(entry["bytes"] for entry in self.index.values())
+
+    def _drop_legacy(self):
+        """
+        Deletes the covers cached under their URL's file name before this store existed. They
+        can't be migrated: the name alone doesn't give back the URL the store hashes.
+        """
+        dropped = freed = 0
+        for f in os.scandir(self.root):
+            if f.is_file() and f.name != "index.json" and not f.name.endswith(".tmp"):
+                freed += f.stat().st_size
+                try:
+                    os.unlink(f.path)
+                except FileNotFoundError:
+                    continue
+                dropped += 1
+        if dropped:
+            print(f"🧹 Removed {dropped} covers from the old image cache ({freed / 2**20:.0f} MB)")
+
+    def _scan(self):
+        """Rebuilds the index from the files themselves (first run, or a lost index)"""
+        index = {}
+        for sub in os.scandir(self.root):
+            if not sub.is_dir() or len(sub.name) != 2:
+                continue
+            for f in os.scandir(sub.path):
+                if f.name.endswith(".tmp"):
+                    continue
+                entry = index.setdefault(f.name.split(".")[0], {"url": None, "bytes": 0, "used": 0.0})
+                stat = f.stat()
+                entry["bytes"] += stat.st_size
+                entry["used"] = max(entry["used"], stat.st_mtime)
+        return index
+
+    def flush(self, force=True):
+        """Writes the index if it changed (and, unless force, the last write was a while ago)"""
+        with self.lock:
+            if not self.dirty or (not force and time.monotonic() - self.saved_at < INDEX_SAVE_SECONDS):
+                return
+            data = json.dumps(self.index, separators=(",", ":")).encode("utf-8")
+            self.dirty = False
+            self.saved_at = time.monotonic()
+        _write_atomic(self.index_path, data)
+
+    def _touch(self, h, url, added=0):
+        with self.lock:
+            entry = self.index.get(h)
+            if entry is None:
+                # Written by another process since our index was loaded: count what is there
+                entry = self.index[h] = {"url": url, "bytes": 0, "used": 0.0}
+                added = sum(os.path.getsize(os.path.join(self._dir(h), f))
+                            for f in os.listdir(self._dir(h)) if f.startswith(h) and not f.endswith(".tmp"))
+            entry["url"] = url
+            entry["used"] = time.time()
+            entry["bytes"] += added
+            self.bytes += added
+            self.dirty = True
+            over = self.bytes > self.max_bytes
+        if over:
+            self.evict()
+        self.flush(force=False)
+
+    def evict(self):
+        """Drops least recently used covers until the store is back under LOW_WATER of its cap"""
+        with self.lock:
+            target = self.max_bytes * LOW_WATER
+            victims = []
+            for h, entry in sorted(self.index.items(), key=lambda item: item[1]["used"]):
+                if self.bytes <= target:
+                    break
+                victims.append(h)
+                self.bytes -= entry["bytes"]
+                del self.index[h]
+            self.dirty = True
+        for h in victims:
+            for f in os.listdir(self._dir(h)):
+                if f.startswith(h):
+                    try:
+                        os.unlink(os.path.join(self._dir(h), f))
+                    except FileNotFoundError:
+                        pass
+        metrics.inc("image_store", "evicted", len(victims))
+
+    # ----------------- Files -----------------
+    def _dir(self, h):
+        return os.path.join(self.root, h[:2])
+
+    def path(self, url, size=None):
+        h = url_hash(url)
+        name = f"{h}.orig" if size is None else f"{h}.{size[0]}x{size[1]}.jpg"
+        return os.path.join(self._dir(h), name)
+
+    def _url_lock(self, h):
+        return self.url_locks[int(h[:8], 16) % URL_LOCKS]
+
+    def _original(self, url, h):
+        """The decoded original and how many bytes were added to fetch it (0 if it was on disk)"""
+        path = self.path(url)
+        if os.path.exists(path):
+            with metrics.timer("image.decode"):
+                return Image.open(path).convert("RGB"), 0
+        with metrics.timer("image.download"):
+            resp = self.http.get(url, timeout=TIMEOUT)
+            resp.raise_for_status()
+            data = resp.content
+        os.makedirs(self._dir(h), exist_ok=True)
+        _write_atomic(path, data)
+        metrics.inc("image_source", "download")
+        with metrics.timer("image.decode"):
+            return Image.open(BytesIO(data)).convert("RGB"), len(data)
+
+    def _make_variants(self, url, h, sizes):
+        """Writes the missing sizes from the original; returns {size: image} and bytes added"""
+        original, added = self._original(url, h)
+        made = {}
+        for size in sizes:
+            with metrics.timer("image.resize"):
+                img = original.resize(size, Image.LANCZOS)
+            out = BytesIO()
+            img.save(out, "JPEG", quality=VARIANT_QUALITY)
+            _write_atomic(self.path(url, size), out.getvalue())
+            added += out.tell()
+            made[size] = img
+        return made, added
+
+    def get(self, url, size):
+        """The cover at url resized to size, as a PIL image; None if it can't be had"""
+        if not url:
+            return None
+        h = url_hash(url)
+        try:
+            path = self.path(url, size)
+            if not os.path.exists(path):
+                with self._url_lock(h):
+                    if not os.path.exists(path):  # another thread may have made it meanwhile
+                        made, added = self._make_variants(url, h, [size])
+                        self._touch(h, url, added)
+                        return made[size]
+            with metrics.timer("image.decode"):
+                img = Image.open(path)
+                img.load()
+            metrics.inc("image_source", "disk")
+            self._touch(h, url)
+            return img.convert("RGB")
+        except Exception as e:
+            metrics.inc("image_source", "failed")
+            print(f"Image load failed: {e}")
+            return None
+
+    def warm(self, urls, workers=WARM_WORKERS, sizes=tuple(VARIANTS.values())):
+        """Downloads and resizes every cover not on disk yet, in parallel. Returns (made, failed)."""
+        def one(url):
+            h = url_hash(url)
+            with self._url_lock(h):
+                missing = [size for size in sizes if not os.path.exists(self.path(url, size))]
+                if missing:
+                    _, added = self._make_variants(url, h, missing)
+                    self._touch(h, url, added)
+            return bool(missing)
+
+        made = failed = 0
+        urls = list(dict.fromkeys(u for u in urls if u))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="warm") as pool:
+            futures = [pool.submit(one, url) for url in urls]
+            for i, future in enumerate(as_completed(futures), 1):
+                try:
+                    made += future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"Image warm-up failed: {e}")
+                if i % 500 == 0:
+                    print(f"🖼️ {i}/{len(urls)} covers checked...")
+        self.flush()
+        return made, failed
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def store():
+    """The process-wide ImageStore"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ImageStore()
+            atexit.register(_store.flush)
+        return _store
+
+
+def warm_catalogue(workers=WARM_WORKERS):
+    """Caches every catalogue cover in every variant; returns (made, failed)"""
+    import redis_db
+    urls = [anime.get("image") for anime in redis_db.get_all_anime()]
+    started = time.perf_counter()
+    made, failed = store().warm(urls, workers)
+    print(f"🖼️ Cached {made} new covers ({failed} failed) of {len(urls)} in {time.perf_counter() - started:.1f} s, "
+          f"store at {store().bytes / 2**20:.0f} MB")
+    return made, failed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Anime cover image store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    warm = sub.add_parser("warm", help="download and resize every catalogue cover")
+    warm.add_argument("--workers", type=int, default=WARM_WORKERS)
+    args = parser.parse_args()
+
+    if args.command == "warm":
+        warm_catalogue(args.workers)
@@ -0,0 +1,171 @@
+# metrics.py
+# Timers and counters for the hot paths of the app and the data layer.
+# Off unless ANIME_METRICS=1; while off, timed() hands back the function untouched
+# and timer()/inc() return straight away.
+#
+#   ANIME_METRICS=1 ANIME_METRICS_PORT=9108 python projectMain.py   # Prometheus text on :9108/metrics
+#   ANIME_METRICS=1 ANIME_METRICS_LOG=30 python projectMain.py      # one summary line every 30 s
+import functools
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.environ.get("ANIME_METRICS") == "1"
+PORT = int(os.environ.get("ANIME_METRICS_PORT") or 0)
+LOG_INTERVAL = float(os.environ.get("ANIME_METRICS_LOG") or 0)
+PREFIX = "anime_"
+
+_lock = threading.Lock()
+_timings = defaultdict(lambda: [0, 0.0, 0.0])   # stage -> [count, total seconds, max seconds]
+_counters = defaultdict(int)                     # (metric, label) -> count
+_gauges = {}                                     # (metric, label) -> callable returning a number
+_local = threading.local()                       # .op: high-level operation running on this thread
+_NULL = nullcontext()
+
+
+def observe(stage, seconds):
+    with _lock:
+        entry = _timings[stage]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+
+def inc(metric, label, n=1):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[metric, label] += n
+
+
+def gauge(metric, label, read):
+    """Registers a number read at export time, e.g. a cache's hit ratio"""
+    _gauges[metric, label] = read
+
+
+class _Timer:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, time.perf_counter() - self.started)
+
+
+def timer(stage):
+    """with timer("image.download"): ... records how long the block took"""
+    return _Timer(stage) if ENABLED else _NULL
+
+
+def timed(op):
+    """
+    Decorator timing every call as stage op. Redis traffic sent while it runs is
+    counted against op too, unless an outer timed() operation already claimed it.
+    """
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            outer = getattr(_local, "op", None)
+            if outer is None:
+                _local.op = op
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(op, time.perf_counter() - started)
+                if outer is None:
+                    _local.op = None
+        return wrapper
+    return decorate
+
+
+def current_op():
+    """The timed() operation running on this thread, or "other" outside one"""
+    return getattr(_local, "op", None) or "other"
+
+
+def snapshot():
+    """{"timings": {stage: (count, total_ms, max_ms)}, "counters": {...}, "gauges": {...}}"""
+    with _lock:
+        timings = {stage: (n, total * 1000, worst * 1000) for stage, (n, total, worst) in _timings.items()}
+        counters = dict(_counters)
+    gauges = {}
+    for key, read in list(_gauges.items()):
+        try:
+            gauges[key] = read()
+        except Exception:
+            pass
+    return {"timings": timings, "counters": counters, "gauges": gauges}
+
+
+def mean_ms(stats, stage):
+    n, total, _ = stats["timings"].get(stage, (0, 0.0, 0.0))
+    return total / n if n else 0.0
+
+
+def render_prometheus():
+    stats = snapshot()
+    lines = [f"# TYPE {PREFIX}stage_seconds summary"]
+    for stage, (n, total, worst) in sorted(stats["timings"].items()):
+        lines.append(f'{PREFIX}stage_seconds_count{{stage="{stage}"}} {n}')
+        lines.append(f'{PREFIX}stage_seconds_sum{{stage="{stage}"}} {total / 1000:.6f}')
+        lines.append(f'{PREFIX}stage_seconds_max{{stage="{stage}"}} {worst / 1000:.6f}')
+    for kind, values in (("counter", stats["counters"]), ("gauge", stats["gauges"])):
+        for metric in sorted({m for m, _ in values}):
+            name = f"{PREFIX}{metric}_total" if kind == "counter" else PREFIX + metric
+            lines.append(f"# TYPE {name} {kind}")
+            for (m, label), value in sorted(values.items()):
+                if m == metric:
+                    lines.append(f'{name}{{name="{label}"}} {value:g}')
+    return "\n".join(lines) + "\n"
+
+
+def log_line():
+    stats = snapshot()
+    parts = [f"{stage} {n}x {total / n:.1f}ms" for stage, (n, total, _) in sorted(stats["timings"].items()) if n]
+    parts += [f"{m}[{label}]={value:g}" for (m, label), value in sorted(stats["counters"].items())]
+    parts += [f"{m}[{label}]={value:.2f}" for (m, label), value in sorted(stats["gauges"].items())]
+    return "📊 " + " | ".join(parts)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start(port=PORT, log_interval=LOG_INTERVAL):
+    """Starts the /metrics endpoint and/or the periodic log line in daemon threads, if asked for"""
+    if not ENABLED:
+        return
+    if port:
+        server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"📊 Metrics on http://127.0.0.1:{server.server_port}/metrics")
+    if log_interval:
+        def log_forever():
+            while True:
+                time.sleep(log_interval)
+                print(log_line())
+        threading.Thread(target=log_forever, daemon=True).start()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# mock_jikan.py
+# Local stand-in for the Jikan /v4/anime endpoint, for running seed.py offline.
+#
+#   python mock_jikan.py --port 8765 --pages 40
+#   python seed.py --base-url "http://127.0.0.1:8765/v4/anime?page={}" --max-pages 0
+
+import argparse
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+GENRES = ["Action", "Adventure", "Comedy", "Drama", "Fantasy", "Horror", "Mystery",
+          "Romance", "Sci-Fi", "Slice of Life", "Sports", "Supernatural", "Suspense"]
+THEMES = ["School", "Military", "Mecha", "Isekai", "Music", "Historical", "Super Power"]
+STUDIOS = ["Madhouse", "Bones", "Sunrise", "MAPPA", "Kyoto Animation", "Production I.G", "Wit Studio"]
+WORDS = ["shingeki", "kyojin", "naruto", "piece", "hero", "academia", "sword", "online", "ghost",
+         "shell", "cowboy", "bebop", "steins", "gate", "death", "note", "fullmetal", "alchemist",
+         "spirited", "away", "hunter", "mob", "psycho", "demon", "slayer", "blue", "lock", "spy", "family"]
+RATINGS = ["G - All Ages", "PG-13 - Teens 13 or older", "R - 17+ (violence & profanity)"]
+
+
+def make_anime(mal_id, rng):
+    title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title()
+    return {
+        "mal_id": mal_id,
+        "title": title,
+        "title_english": title if rng.random() < 0.6 else None,
+        "title_japanese": "".join(chr(rng.randint(0x30A1, 0x30F6)) for _ in range(rng.randint(3, 9))),
+        "synopsis": " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 160))).capitalize() + ".",
+        "year": rng.randint(1970, 2025) if rng.random() < 0.9 else None,
+        "episodes": rng.randint(1, 500) if rng.random() < 0.95 else None,
+        "duration": f"{rng.randint(5, 30)} min per ep",
+        "score": round(rng.uniform(4, 9.3), 2) if rng.random() < 0.9 else None,
+        "rating": rng.choice(RATINGS),
+        "genres": [{"name": g} for g in rng.sample(GENRES, rng.randint(1, 4))],
+        "themes": [{"name": t} for t in rng.sample(THEMES, rng.randint(0, 2))],
+        "studios": [{"name": rng.choice(STUDIOS)}],
+        "images": {"jpg": {"image_url": f"https://cdn.example.invalid/images/anime/{mal_id}.jpg"}},
+    }
+
+
+def make_page(page, pages, per_page, seed=0):
+    rng = random.Random(seed * 1_000_003 + page)
+    data = []
+    if 1 <= page <= pages:
+        data = [make_anime((page - 1) * per_page + i + 1, rng) for i in range(per_page)]
+    return {
+        "pagination": {
+            "last_visible_page": pages,
+            "has_next_page": page < pages,
+            "current_page": page,
+            "items": {"count": len(data), "total": pages * per_page, "per_page": per_page},
+        },
+        "data": data,
+    }
+
+
+def make_handler(pages, per_page, seed, throttle_every):
+    lock = threading.Lock()
+    hits = [0]
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path.rstrip("/") != "/v4/anime":
+                self.send_error(404)
+                return
+            with lock:
+                hits[0] += 1
+                throttled = throttle_every and hits[0] % throttle_every == 0
+            if throttled:
+                self.send_response(429)
+                self.send_header("Retry-After", "1")
+                self.end_headers()
+                return
+            page = int(parse_qs(url.query).get("page", ["1"])[0])
+            body = json.dumps(make_page(page, pages, per_page, seed)).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_server(port=0, pages=10, per_page=25, seed=0, throttle_every=0):
+    """Starts the mock in a daemon thread; returns (server, page URL template)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(pages, per_page, seed, throttle_every))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v4/anime?page={{}}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock Jikan API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--per-page", type=int, default=25)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--throttle-every", type=int, default=0, help="answer every Nth request with a 429")
+    args = parser.parse_args()
+
+    server, url = start_server(args.port, args.pages, args.per_page, args.seed, args.throttle_every)
+    print(f"🚀 Mock Jikan listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
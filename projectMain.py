@@ -1,21 +1,82 @@
 # projectMain.py
+import time
+STARTED = time.perf_counter()   # startup timings count from here
+
+# Eager on purpose: nothing paints without customtkinter, and it imports PIL itself
 import customtkinter as ctk
 from customtkinter import CTkImage
 from PIL import Image
-import requests
-from io import BytesIO
+import importlib
+import json
 import os
 import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import tkinter.messagebox as msgbox
-import redis_db 
+import metrics
+import snapshot_file
+from records import title_matches
+IMPORTED = time.perf_counter()
 
 # ----------------- Config -----------------
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
-ITEMS_PER_PAGE = 6
-IMAGE_CACHE_DIR = "images_cache"
-os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+# Virtual scrolling: a page holds many more cards, but only VISIBLE_ROWS rows of widgets exist
+VIRTUAL_SCROLL = os.environ.get("ANIME_VIRTUAL_SCROLL") == "1"
+VISIBLE_ROWS = 2
+CARD_COLUMNS = 3
+
+ITEMS_PER_PAGE = 60 if VIRTUAL_SCROLL else 6
+CARD_IMAGE_SIZE = (280, 400)     # image_store.VARIANTS, so covers come pre-resized from disk
+DETAIL_IMAGE_SIZE = (440, 620)
+IMAGE_WORKERS = 6
+PREFETCH_DEPTH = 1     # pages warmed ahead of and behind the current one
+PREFETCH_WORKERS = 2   # kept apart from IMAGE_WORKERS so the visible page always goes first
+
+# Startup: print the timings as JSON and quit once the first synced results are on screen (see bench.py startup)
+EXIT_AFTER_STARTUP = os.environ.get("ANIME_STARTUP_EXIT") == "1"
+
+
+class Lazy:
+    """
+    Stands in for what factory() returns, calling it on first attribute access. Keeps
+    redis, NumPy and requests out of startup: they load when (and on the thread where)
+    they're first needed.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._target = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    self._target = self._factory()
+        return getattr(self._target, name)
+
+
+redis_db = Lazy(lambda: importlib.import_module("redis_db"))
+image_store = Lazy(lambda: importlib.import_module("image_store"))
+
+# Set to an api_server URL to browse through it instead of talking to Redis directly
+API_URL = os.environ.get("ANIME_API_URL")
+catalogue = Lazy(lambda: importlib.import_module("api_client").RemoteCatalogue(API_URL)) if API_URL else redis_db
+
+# Live search: fires once typing pauses for SEARCH_DELAY_MS
+SEARCH_DELAY_MS = 250
+SEARCH_CACHE_SIZE = 16     # recent result sets kept for refined queries
+REFINE_MAX_HITS = 5000     # result sets up to this size are kept whole, so "nar" -> "naru" filters them locally
+# Through api_server only a page travels per search; a whole set would take many MAX_LIMIT-sized requests
+SEARCH_FETCH = ITEMS_PER_PAGE if API_URL else REFINE_MAX_HITS
+
+# One thread pool shared by every cover load
+image_pool = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="images")
+prefetch_pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+# One worker: searches run one at a time, and queued ones are cancelled when a newer one arrives
+search_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
 
 PALETTE = [
     "#2D00F7", "#6A00F4", "#8900F2", "#A100F2",
@@ -24,33 +85,199 @@ PALETTE = [
 ]
 
 # ----------------- Helpers -----------------
-def cache_image(url):
-    if not url:
-        return None
-    fname = url.split("/")[-1].split("?")[0]
-    path = os.path.join(IMAGE_CACHE_DIR, fname)
-    if os.path.exists(path):
-        try:
-            return Image.open(path).convert("RGB")
-        except:
-            pass
-    try:
-        resp = requests.get(url, timeout=8)
-        resp.raise_for_status()
-        data = resp.content
-        with open(path, "wb") as f:
-            f.write(data)
-        return Image.open(BytesIO(data)).convert("RGB")
-    except Exception as e:
-        print(f"Image download failed: {e}")
-        return None
+def load_image(url, size):
+    """Runs on the image pool: the cover at size, from the disk store (downloaded and resized on a miss)"""
+    return image_store.store().get(url, size)
+
+class ImageLRU:
+    """
+    Ready-to-display CTkImages keyed by (url, size).
+    Evicts least recently used entries once the decoded pixels exceed max_bytes.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()   # (url, size) -> (CTkImage, bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, ctk_img, nbytes):
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old:
+                self.bytes -= old[1]
+            self.entries[key] = (ctk_img, nbytes)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes and len(self.entries) > 1:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.bytes -= evicted
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {"entries": len(self.entries), "bytes": self.bytes, "hits": self.hits,
+                    "misses": self.misses, "hit_ratio": self.hits / total if total else 0.0}
+
+# Cards and details are cached apart so opening details never pushes out a page of covers
+card_images = ImageLRU(max_bytes=64 * 1024 * 1024)
+detail_images = ImageLRU(max_bytes=32 * 1024 * 1024)
+for name, lru in (("card", card_images), ("detail", detail_images)):
+    metrics.gauge("image_cache_hit_ratio", name, lambda lru=lru: lru.stats()["hit_ratio"])
+    metrics.gauge("image_cache_bytes", name, lambda lru=lru: lru.bytes)
+
+def image_cache_for(size):
+    return detail_images if size == DETAIL_IMAGE_SIZE else card_images
+
+def image_bytes(pil_img):
+    return pil_img.width * pil_img.height * len(pil_img.getbands())
 
 def make_ctk_image(pil_img, size=(220, 300)):
     try:
-        return CTkImage(light_image=pil_img.resize(size), dark_image=pil_img.resize(size), size=size)
+        with metrics.timer("image.ctk"):
+            if pil_img.size != size:
+                pil_img = pil_img.resize(size)
+            return CTkImage(light_image=pil_img, dark_image=pil_img, size=size)
     except:
         return None
 
+def search_matches(anime, params):
+    """True if anime (None if gone) belongs in the results of params; None if only the catalogue can tell"""
+    if params.get("fulltext") and params.get("query"):
+        return None
+    if anime is None:
+        return False
+    genre = (params.get("genre") or "").lower()
+    year_from, year_to = params.get("year_from"), params.get("year_to")
+    return ((not genre or any(g.lower() == genre for g in anime.genres))
+            and (not year_from or (anime.year is not None and anime.year >= year_from))
+            and (not year_to or (anime.year is not None and anime.year <= year_to))
+            and title_matches(anime, params.get("query")))
+
+class SearchCache:
+    """
+    Complete hit lists of recent searches, tagged with the catalogue version they came from.
+    A refinement of a cached search (longer title query, narrower year range, same genre
+    and sort) is answered by filtering its hits instead of asking Redis again.
+    Only the search worker touches it.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()   # search key -> (version, hits)
+
+    @staticmethod
+    def key(params):
+        return (" ".join((params.get("query") or "").lower().split()), params.get("genre") or "",
+                params.get("year_from"), params.get("year_to"),
+                bool(params.get("fulltext") and params.get("query")), params.get("sort_by", "title"))
+
+    @staticmethod
+    def narrows(new, old):
+        """True if every hit of new is among the hits of old, in the same order"""
+        query, genre, year_from, year_to, fulltext, sort_by = new
+        old_query, old_genre, old_from, old_to, old_fulltext, old_sort = old
+        return (not fulltext and not old_fulltext and genre == old_genre and sort_by == old_sort
+                and query.startswith(old_query)
+                and (old_from is None or (year_from is not None and year_from >= old_from))
+                and (old_to is None or (year_to is not None and year_to <= old_to)))
+
+    def get(self, params, version):
+        key = self.key(params)
+        entry = self.entries.get(key)
+        if entry and entry[0] == version:
+            self.entries.move_to_end(key)
+            return entry[1]
+        # Narrowest cached superset first: the fewest hits to filter
+        supersets = [hits for old, (v, hits) in self.entries.items() if v == version and self.narrows(key, old)]
+        if not supersets:
+            return None
+        query, _, year_from, year_to, _, _ = key
+        hits = [a for a in min(supersets, key=len)
+                if (not year_from or (a.year is not None and a.year >= year_from))
+                and (not year_to or (a.year is not None and a.year <= year_to))
+                and title_matches(a, query)]
+        self.put(params, version, hits)
+        return hits
+
+    def clear(self):
+        self.entries.clear()
+
+    def put(self, params, version, hits):
+        key = self.key(params)
+        self.entries[key] = (version, hits)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+# ----------------- Card Pool -----------------
+class CardWidget:
+    """One pooled card: its widgets are built once, then re-bound to whichever anime it shows"""
+
+    def __init__(self, parent, app):
+        self.app = app
+        self.anime = None
+        self.visible = False
+
+        self.frame = ctk.CTkFrame(parent, width=360, height=600, corner_radius=18, border_width=1, border_color="#333")
+        self.frame.pack_propagate(False)
+
+        self.image_label = ctk.CTkLabel(self.frame, image=app.card_placeholder, text="", text_color="#666")
+        self.image_label.pack(pady=(15, 8))
+        self.title_label = ctk.CTkLabel(self.frame, text="", font=ctk.CTkFont(size=17, weight="bold"),
+                                        wraplength=300, justify="center")
+        self.title_label.pack(pady=(10, 5))
+        self.meta_label = ctk.CTkLabel(self.frame, text="", text_color="#BBBBBB")
+        self.meta_label.pack(pady=2)
+        self.genres_label = ctk.CTkLabel(self.frame, text="", font=ctk.CTkFont(size=11), wraplength=300)
+        self.genres_label.pack(pady=8)
+        ctk.CTkButton(self.frame, text="More Details", width=240, height=40,
+                      command=self.on_details).pack(side="bottom", pady=18)
+
+    def on_details(self):
+        if self.anime:
+            self.app.open_details(self.anime)
+
+    def bind(self, anime, generation):
+        """Shows anime in this card; returns the pending cover future, if any"""
+        self.anime = anime
+        self.title_label.configure(text=anime.get("title", "Unknown"))
+        self.meta_label.configure(
+            text=f"{anime.get('score', 'N/A')} • {anime.get('year', '????')} • {anime.get('episodes', '?')} eps")
+        genres_txt = ", ".join(anime.get("genres", [])[:4])
+        if len(anime.get("genres", [])) > 4: genres_txt += "..."
+        self.genres_label.configure(text=genres_txt)
+
+        url = anime.get("image")
+        self.image_label.configure(image=self.app.card_placeholder, text="Loading..." if url else "No Image")
+        future = self.app.load_image_async(self.image_label, url, CARD_IMAGE_SIZE, generation) if url else None
+
+        if not self.visible:
+            self.frame.pack(side="left", padx=15, pady=10)
+            self.visible = True
+        return future
+
+    def hide(self):
+        self.anime = None
+        if self.visible:
+            self.frame.pack_forget()
+            self.visible = False
+
 # ----------------- Main App -----------------
 class AnimeApp(ctk.CTk):
     def __init__(self):
@@ -60,16 +287,55 @@ class AnimeApp(ctk.CTk):
         self.minsize(1100, 700)
 
         self.current_page = 0
-        self.current_results = []
-        self.is_loading = False
-
+        self.current_results = []    # only the anime on the current page
+        self.total_results = 0
+        self.search_params = {}      # search_page arguments of the current result set
+        self.sort_by = "title"
+        self.page_cache = {}         # page -> anime, for the current page and prefetched neighbours
+        self.startup_snapshot = None # snapshot file serving pages until redis_db's cache has loaded it
+        self.search_generation = 0   # bumped per search started, so only the latest one is shown
+        self.search_future = None
+        self.search_after = None     # pending debounced search
+        self.search_cache = SearchCache(SEARCH_CACHE_SIZE)
+        self.render_generation = 0   # bumped on every render so late images for old pages are dropped
+        self.results_generation = 0  # bumped whenever a new result set starts
+        self.image_futures = []
+        self.prefetch_futures = []
+        self.page_items = []
+        self.first_row = 0           # first row of page_items shown by the pool (virtual scrolling)
+        self.last_render_ms = 0.0
+        self.last_render = {}        # stage timings and cover counts of the last render, for the debug overlay
+        self.startup = {"imports": IMPORTED - STARTED}   # stage -> seconds since launch
+
+        # Stage 1: the window shell goes on screen before anything slow happens
         self._build_ui()
-        threading.Thread(target=self.load_all_anime, daemon=True).start()
+        self.update()
+        self.mark_startup("first_paint")
+        # Stage 2: the card pool, then data: genres and page 1 from the snapshot file, Redis behind them
+        self._build_cards_area()
+        if metrics.ENABLED:
+            self._build_debug_overlay()
+        self.load_genres_into_dropdowns()
+        self.load_from_snapshot()
+        self.start_change_feed()
+
+    def mark_startup(self, stage):
+        """Records when a startup stage was first reached; reports them all once results are synced"""
+        if stage in self.startup:
+            return
+        self.startup[stage] = time.perf_counter() - STARTED
+        metrics.observe(f"startup.{stage}", self.startup[stage])
+        if stage != "synced":
+            return
+        print("⏱️ Startup: " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.startup.items()))
+        if EXIT_AFTER_STARTUP:
+            print("STARTUP " + json.dumps({name: round(seconds * 1000, 1) for name, seconds in self.startup.items()}))
+            self.after(0, self.destroy)
 
     def _build_ui(self):
+        """The window shell; the cards area is built into it afterwards (see __init__)"""
         self._build_header()
         self._build_search()
-        self._build_cards_area()
         self._build_pagination()
 
     def _build_header(self):
@@ -89,6 +355,10 @@ class AnimeApp(ctk.CTk):
         self.year_from_var = ctk.StringVar()
         self.year_to_var = ctk.StringVar()
         self.remove_genre_var = ctk.StringVar(value="Remove genre...")
+        self.fulltext_var = ctk.BooleanVar(value=False)
+        # Search as you type
+        for var in (self.search_var, self.genre_var, self.year_from_var, self.year_to_var, self.fulltext_var):
+            var.trace_add("write", self.schedule_search)
 
         # Title Search
         ctk.CTkEntry(frame, width=380, height=44,
@@ -112,6 +382,9 @@ class AnimeApp(ctk.CTk):
         ctk.CTkButton(frame, text="Search", width=130, height=44,
                       command=self.on_search_click, fg_color="#0066FF", font=ctk.CTkFont(size=14, weight="bold")).pack(side="left", padx=8)
 
+        # Full-text: ranked search over synopsis, themes and studios too, typo tolerant
+        ctk.CTkCheckBox(frame, text="Synopsis & fuzzy", variable=self.fulltext_var).pack(side="left", padx=8)
+
         #Remove Genre Dropdown
         self.remove_genre_menu = ctk.CTkOptionMenu(
             frame,
@@ -129,25 +402,94 @@ class AnimeApp(ctk.CTk):
         ctk.CTkButton(frame, text="Show All", width=130, height=44,
                       command=self.on_show_all).pack(side="left", padx=8)
 
-
-        self.after(800, self.load_genres_into_dropdowns)
-
     def load_genres_into_dropdowns(self):
-        try:
-            genres = sorted(redis_db.get_distinct_genres())
-            self.genre_option.configure(values=["(Any)"] + genres)
-            self.remove_genre_menu.configure(values=["Remove genre..."] + genres)
-        except:
+        """Asks the search worker for the genres, so a slow or restarting Redis never freezes the window"""
+        future = search_pool.submit(lambda: catalogue.get_distinct_genres())
+        future.add_done_callback(lambda f: self.after(0, lambda: self._show_genres(f)))
+
+    def _show_genres(self, future):
+        if future.exception() is not None:
             self.after(1000, self.load_genres_into_dropdowns)  # retry
+            return
+        self.set_genres(future.result())
+
+    def set_genres(self, genres):
+        genres = sorted(genres)
+        self.genre_option.configure(values=["(Any)"] + genres)
+        self.remove_genre_menu.configure(values=["Remove genre..."] + genres)
 
     def _build_cards_area(self):
-        self.cards_frame = ctk.CTkScrollableFrame(self)
-        self.cards_frame.pack(fill="both", expand=True, padx=30, pady=12)
+        self.card_placeholder = CTkImage(Image.new("RGB", CARD_IMAGE_SIZE, "#2B2B2B"), size=CARD_IMAGE_SIZE)
+
+        # Packed above the pagination bar, which is already in place
+        if VIRTUAL_SCROLL:
+            area = ctk.CTkFrame(self)
+            area.pack(fill="both", expand=True, padx=30, pady=12, before=self.pagination)
+            self.cards_frame = ctk.CTkFrame(area, fg_color="transparent")
+            self.cards_frame.pack(side="left", fill="both", expand=True)
+            self.cards_scrollbar = ctk.CTkScrollbar(area, command=self.on_virtual_scroll)
+            self.cards_scrollbar.pack(side="right", fill="y")
+            self.bind_all("<MouseWheel>", self.on_mouse_wheel)
+            self.bind_all("<Button-4>", self.on_mouse_wheel)
+            self.bind_all("<Button-5>", self.on_mouse_wheel)
+            rows = VISIBLE_ROWS
+        else:
+            self.cards_frame = ctk.CTkScrollableFrame(self)
+            self.cards_frame.pack(fill="both", expand=True, padx=30, pady=12, before=self.pagination)
+            rows = (ITEMS_PER_PAGE + CARD_COLUMNS - 1) // CARD_COLUMNS
+
+        # The whole widget pool is built once, render_page only re-binds it
+        self.card_rows = []
+        for _ in range(rows):
+            row = ctk.CTkFrame(self.cards_frame, fg_color="transparent")
+            self.card_rows.append((row, [CardWidget(row, self) for _ in range(CARD_COLUMNS)]))
+
+    def _build_debug_overlay(self):
+        """Last render breakdown and data layer timings in the corner; F12 toggles it"""
+        self.debug_label = ctk.CTkLabel(self, text="", justify="left", anchor="nw", fg_color="#111111",
+                                        text_color="#7CFC00", font=ctk.CTkFont(family="Courier", size=11),
+                                        corner_radius=6)
+        self.debug_visible = True
+        self.bind_all("<F12>", self.toggle_debug_overlay)
+        self.refresh_debug_overlay()
+
+    def toggle_debug_overlay(self, event=None):
+        self.debug_visible = not self.debug_visible
+        if self.debug_visible:
+            self.refresh_debug_overlay()
+        else:
+            self.debug_label.place_forget()
+
+    def refresh_debug_overlay(self):
+        if not self.debug_visible:
+            return
+        stats = metrics.snapshot()
+        render = self.last_render
+        lines = [f"render   {render.get('total_ms', 0):6.1f} ms  (bind {render.get('bind_ms', 0):.1f}, "
+                 f"prefetch {render.get('prefetch_ms', 0):.1f})",
+                 f"covers   {render.get('covers_cached', 0)} from memory, {render.get('covers_queued', 0)} queued"]
+        for stage in ("app.search", "catalogue.search_page", "redis_db.sync_cache", "columnar.build",
+                      "image.download", "image.decode", "image.resize", "image.ctk"):
+            lines.append(f"{stage:22} {metrics.mean_ms(stats, stage):7.1f} ms avg")
+        trips = stats["counters"]
+        lines.append(f"redis    {sum(v for (m, _), v in trips.items() if m == 'redis_round_trips')} round trips, "
+                     f"{sum(v for (m, _), v in trips.items() if m == 'redis_commands')} commands")
+        lines.append("startup  " + ", ".join(f"{name} {seconds * 1000:.0f}" for name, seconds in self.startup.items())
+                     + " ms")
+        lines.append(f"img hit  card {card_images.stats()['hit_ratio']:.0%}, detail {detail_images.stats()['hit_ratio']:.0%}")
+        self.debug_label.configure(text="\n".join(lines))
+        self.debug_label.place(relx=1.0, x=-12, y=12, anchor="ne")
+        self.debug_label.lift()
+        self.after(1000, self.refresh_debug_overlay)
 
     def _build_pagination(self):
-        pag = ctk.CTkFrame(self)
+        pag = self.pagination = ctk.CTkFrame(self)
         pag.pack(pady=18)
 
+        self.sort_menu = ctk.CTkOptionMenu(pag, values=["Title", "Score", "Year", "Episodes"], width=140,
+                                           command=self.on_sort_selected)
+        self.sort_menu.pack(side="left", padx=20)
+
         self.prev_btn = ctk.CTkButton(pag, text="Previous", width=140, command=self.prev_page)
         self.page_label = ctk.CTkLabel(pag, text="Page 1 / 1", width=180, font=ctk.CTkFont(size=14))
         self.next_btn = ctk.CTkButton(pag, text="Next", width=140, command=self.next_page)
@@ -157,23 +499,141 @@ class AnimeApp(ctk.CTk):
         self.next_btn.pack(side="left", padx=20)
 
     # ----------------- Data & Search -----------------
-    def load_all_anime(self):
-        if self.is_loading: return
-        self.is_loading = True
+    def load_all_anime(self, params=None):
+        self.start_search(params or {"sort_by": self.sort_by})
+
+    def load_from_snapshot(self):
+        """
+        Cold start: page 1 comes straight from the mapped snapshot file, then the search worker
+        loads the rest of it into redis_db's cache, syncs that with Redis (only what changed since
+        the file was written), shows the reconciled results and saves a fresh snapshot.
+        """
+        snapshot = None if API_URL else snapshot_file.open_snapshot()
+        loaded = None
+        if snapshot is not None:
+            started = time.perf_counter()
+            with metrics.timer("app.snapshot_first_page"):
+                self.startup_snapshot = snapshot
+                items = snapshot.page(0, ITEMS_PER_PAGE, self.sort_by)
+                self.search_params = {"sort_by": self.sort_by}
+                self.set_results(items, len(snapshot))
+                self.render_page()
+            self.mark_startup("first_results")
+            print(f"⚡ Page 1 from {snapshot_file.PATH} (version {snapshot.version}, "
+                  f"{len(snapshot)} anime) in {(time.perf_counter() - started) * 1000:.0f} ms")
+            if snapshot.genres:
+                self.set_genres(snapshot.genres)
+            loaded = (snapshot.dataset, snapshot.version)
+            search_pool.submit(self.adopt_snapshot, snapshot)
+        self.load_all_anime()  # queued behind load_snapshot on the one search worker
+        if not API_URL:
+            search_pool.submit(self.save_snapshot, loaded)
+
+    def adopt_snapshot(self, snapshot):
+        """
+        Search worker: loads the snapshot into redis_db's cache. Until then pages come from the
+        file, since any catalogue read would load the whole catalogue from Redis instead.
+        """
         try:
-            anime_list = redis_db.get_all_anime()
-            anime_list.sort(key=lambda x: x.get("title", "").lower())
-            self.current_results = anime_list
-            self.current_page = 0
-        except Exception as e:
-            msgbox.showerror("Error", f"Failed to load data:\n{e}")
+            redis_db.load_snapshot(snapshot, close=False)
         finally:
-            self.is_loading = False
-            self.after(0, self.render_page)
+            self.after(0, self._snapshot_adopted)
+
+    def _snapshot_adopted(self):
+        self.startup_snapshot.close()
+        self.startup_snapshot = None
+
+    def snapshot_page(self, page):
+        """A page of the startup snapshot's result set (title order unless re-sorted meanwhile)"""
+        return self.startup_snapshot.page(page * ITEMS_PER_PAGE, ITEMS_PER_PAGE, self.search_params["sort_by"])
+
+    def start_change_feed(self):
+        """Follows every client's writes (ours too) on a daemon thread; through api_server there's no feed"""
+        if not API_URL:
+            threading.Thread(target=self.follow_changes, name="feed", daemon=True).start()
+
+    def follow_changes(self):
+        """Feed thread: applies change events to the cache, then hands the touched keys to the UI"""
+        last_id, seen, delay = None, None, 1.0
+        while True:
+            try:
+                if last_id is None:
+                    last_id = redis_db.feed_position()
+                last_id, events = redis_db.read_feed(last_id)
+                delay = 1.0
+            except Exception as e:
+                # Resumes from last_id, so nothing written meanwhile is missed (unless it was trimmed)
+                print(f"⚠️ Change feed interrupted, retrying in {delay:.0f} s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, 30.0)
+                continue
+            if not events:
+                continue
+            # What the events' anime were before, to tell which of them join or leave the results
+            before = redis_db.cached_anime({key for _, _, keys in events for key in keys})
+            try:
+                touched = redis_db.apply_changes(events, seen)
+            except Exception as e:
+                print(f"⚠️ Could not apply catalogue changes: {e}")
+                touched = None
+            seen = events[-1][0]
+            ops = {op for _, op, _ in events}
+            self.after(0, lambda: self.show_changes(touched, ops, before))
+
+    def show_changes(self, touched, ops, before):
+        """
+        Patches the loaded pages with changed anime and re-renders if the current page was among
+        them. When an anime joins, leaves or moves within the current results, or the change
+        reaches across the catalogue (touched None, a genre removal), the search runs again.
+        """
+        if ops & {"genre", "reset"}:
+            self.load_genres_into_dropdowns()
+        loaded = {anime.get("id"): anime for items in self.page_cache.values() for anime in items}
+        current = redis_db.cached_anime(touched) if touched else {}
+        # The loaded copy is what we showed: our own writes are in the cache before their event arrives
+        if touched is None or "genre" in ops or self.results_moved(touched, {**before, **loaded}, current):
+            search_pool.submit(self.search_cache.clear)
+            self.start_search(self.search_params or None)
+            return
+        if not touched & loaded.keys():
+            return
+        visible = False
+        for page, items in self.page_cache.items():
+            if any(anime.get("id") in touched for anime in items):
+                visible |= page == self.current_page
+                self.page_cache[page] = [current.get(anime.get("id")) or anime for anime in items]
+        self.current_results = self.page_cache.get(self.current_page, self.current_results)
+        if visible:
+            self.render_page()
 
-    def on_search_click(self):
-        if self.is_loading: return
+    def results_moved(self, touched, old, current):
+        """True if any touched anime joined or left the current results, or changed its place in them"""
+        params = self.search_params
+        sort_by = params.get("sort_by", "title")
+        for key in touched:
+            was, now = search_matches(old.get(key), params), search_matches(current.get(key), params)
+            if was is None or was != now:
+                return True
+            if now and old[key].get(sort_by) != current[key].get(sort_by):
+                return True
+        return False
+
+    def after_write(self):
+        """After our own write: the change feed brings it to the cards; without one, search again"""
+        if API_URL:
+            self.load_all_anime()
+
+    def save_snapshot(self, loaded):
+        """Search worker: rewrites the snapshot file unless it holds the catalogue as it is (dataset, version)"""
+        try:
+            if redis_db.is_offline() or (redis_db.catalogue_dataset(), redis_db.catalogue_version()) == loaded:
+                return
+            redis_db.export_snapshot()
+        except Exception as e:
+            print(f"⚠️ Could not save the catalogue snapshot: {e}")
 
+    def read_search_params(self, warn=False):
+        """search_page arguments from the search bar, or None while a year field isn't a number"""
         query = self.search_var.get().strip()
         genre = self.genre_var.get()
         genre = "" if genre == "(Any)" else genre
@@ -185,24 +645,135 @@ class AnimeApp(ctk.CTk):
         year_to = int(year_to_str) if year_to_str.isdigit() else None
 
         if (year_from_str and not year_from_str.isdigit()) or (year_to_str and not year_to_str.isdigit()):
-            msgbox.showwarning("Invalid Year", "Please enter valid numbers for years.")
-            return
+            if warn:
+                msgbox.showwarning("Invalid Year", "Please enter valid numbers for years.")
+            return None
+
+        return dict(
+            query=query,
+            genre=genre,
+            year_from=year_from,
+            year_to=year_to,
+            fulltext=self.fulltext_var.get(),
+            sort_by=self.sort_by
+        )
 
-        self.is_loading = True
+    def schedule_search(self, *_):
+        """Restarts the debounce timer on every keystroke; the search runs once typing pauses"""
+        if self.search_after is not None:
+            self.after_cancel(self.search_after)
+        self.search_after = self.after(SEARCH_DELAY_MS, self.start_search)
+
+    def on_search_click(self):
+        params = self.read_search_params(warn=True)
+        if params is not None:
+            self.start_search(params)
+
+    def start_search(self, params=None):
+        """Hands the search to the search worker; whichever search started last is the one shown"""
+        if self.search_after is not None:
+            self.after_cancel(self.search_after)
+            self.search_after = None
+        if params is None:
+            params = self.read_search_params()
+            if params is None:
+                return
+
+        self.search_generation += 1
+        generation = self.search_generation
+        if self.search_future is not None:
+            self.search_future.cancel()  # only stops it if it hasn't started yet
+        self.search_future = search_pool.submit(self.run_search, params)
+        self.search_future.add_done_callback(
+            lambda f: self.after(0, lambda: self._finish_search(f, params, generation)))
+
+    def run_search(self, params):
+        """
+        Runs on the search worker. Returns (hits, total): every hit when there are at most
+        SEARCH_FETCH of them, otherwise just the first page. Only whole sets are cached.
+        """
+        with metrics.timer("app.search"):
+            version = catalogue.catalogue_version()
+            hits = self.search_cache.get(params, version)
+            if hits is not None:
+                metrics.inc("search_cache", "hit")
+                return hits, len(hits)
+            metrics.inc("search_cache", "miss")
+            with metrics.timer("catalogue.search_page"):
+                hits, total = catalogue.search_page(**params, offset=0, limit=SEARCH_FETCH)
+            if total > len(hits):
+                return hits[:ITEMS_PER_PAGE], total
+            self.search_cache.put(params, version, hits)
+            return hits, total
+
+    def _finish_search(self, future, params, generation):
+        if future.cancelled() or generation != self.search_generation:
+            return  # superseded by a newer search
         try:
-            results = redis_db.search_anime(
-                query=query,
-                genre=genre,
-                year_from=year_from,
-                year_to=year_to
-            )
-            self.current_results = results
-            self.current_page = 0
-            self.render_page()
+            hits, total = future.result()
         except Exception as e:
             msgbox.showerror("Error", f"Search failed:\n{e}")
-        finally:
-            self.is_loading = False
+            return
+        self.search_params = params
+        self.set_results(hits, total)
+        self.render_page()
+        self.mark_startup("first_results")
+        self.mark_startup("synced")
+        offline = not API_URL and redis_db.is_offline()
+        self.title("Anime Explorer (offline)" if offline else "Anime Explorer")
+
+    def on_sort_selected(self, choice):
+        self.sort_by = choice.lower()
+        self.start_search({**self.search_params, "sort_by": self.sort_by})
+
+    def set_results(self, results, total):
+        """
+        Starts a new result set: results is its first page, or all of it,
+        total the number of matches.
+        """
+        self.page_cache = {i // ITEMS_PER_PAGE: results[i:i + ITEMS_PER_PAGE]
+                           for i in range(0, len(results), ITEMS_PER_PAGE)} or {0: []}
+        self.current_results = self.page_cache[0]
+        self.total_results = total
+        self.current_page = 0
+        self.results_generation += 1
+        self.cancel_prefetch()
+
+    def on_worker(self, job, done):
+        """Runs job on the search worker, then done(future) on the Tk thread, so Redis never blocks the window"""
+        future = search_pool.submit(job)
+        future.add_done_callback(lambda f: self.after(0, lambda: done(f)))
+        return future
+
+    def show_page(self, page):
+        """Shows a page of the current result set, from the prefetched pages when possible"""
+        items = self.page_cache.get(page)
+        if items is None and self.startup_snapshot is not None:
+            items = self.page_cache[page] = self.snapshot_page(page)
+        if items is not None:
+            self._show_page(page, items)
+            return
+        params, generation = self.search_params, self.results_generation
+
+        def fetch():
+            with metrics.timer("catalogue.search_page"):
+                return catalogue.search_page(**params, offset=page * ITEMS_PER_PAGE, limit=ITEMS_PER_PAGE)
+        self.on_worker(fetch, lambda f: self._page_fetched(f, page, generation))
+
+    def _page_fetched(self, future, page, generation):
+        if generation != self.results_generation:
+            return  # a new search replaced the result set meanwhile
+        if future.exception() is not None:
+            msgbox.showerror("Error", f"Failed to load page:\n{future.exception()}")
+            return
+        items, self.total_results = future.result()
+        self.page_cache[page] = items
+        self._show_page(page, items)
+
+    def _show_page(self, page, items):
+        self.current_results = items
+        self.current_page = page
+        self.render_page()
 
     def on_show_all(self):
         self.search_var.set("")
@@ -210,7 +781,7 @@ class AnimeApp(ctk.CTk):
         self.year_from_var.set("")
         self.year_to_var.set("")
         self.remove_genre_var.set("Remove genre...")
-        threading.Thread(target=self.load_all_anime, daemon=True).start()
+        self.load_all_anime()
 
     def on_remove_genre_selected(self, selected_genre):
         if selected_genre == "Remove genre...":
@@ -225,107 +796,271 @@ class AnimeApp(ctk.CTk):
             self.remove_genre_var.set("Remove genre...")
             return
 
-        # Perform removal
-        count_removed_anime = redis_db.remove_genre(selected_genre)
-        print(count_removed_anime)
-        if count_removed_anime > 0:
+        self.remove_genre_var.set("Remove genre...")
+        self.on_worker(lambda: catalogue.remove_genre(selected_genre),
+                       lambda f: self._genre_removed(f, selected_genre))
+
+    def _genre_removed(self, future, selected_genre):
+        if future.exception() is not None:
+            msgbox.showerror("Error", f"Could not remove the genre:\n{future.exception()}")
+            return
+        affected = set(future.result())
+        if affected:
             msgbox.showinfo("Success!",
-                            f"Genre \"{selected_genre}\" has been removed from {count_removed_anime} anime!")
+                            f"Genre \"{selected_genre}\" has been removed from {len(affected)} anime!")
         else:
             msgbox.showwarning("Warning!",
                                f"the genre you selected (\"{selected_genre}\") was empty ")
 
-        self.remove_genre_var.set("Remove genre...")
-        threading.Thread(target=self.load_all_anime, daemon=True).start()
-
+        if affected and (self.search_params.get("genre") or "").lower() == selected_genre.lower():
+            # Filtered by the genre just removed: none of the results match any more
+            search_pool.submit(self.search_cache.clear)
+            self.start_search(self.search_params)
+            return
+        # Patch the visible results in place instead of reloading everything
+        self.current_results = [
+            {**anime, "genres": [g for g in anime["genres"] if g != selected_genre]}
+            if anime.get("id") in affected else anime
+            for anime in self.current_results
+        ]
+        self.page_cache = {self.current_page: self.current_results}
+        self.render_page()
+        self.load_genres_into_dropdowns()
+
+
+    # ----------------- Images -----------------
+    def load_image_async(self, label, url, size, generation=None):
+        """
+        Shows the cover right away if it's in memory, otherwise swaps it into label
+        once a worker has it. Returns the pending future, or None on a memory hit.
+        """
+        ctk_img = image_cache_for(size).get((url, size))
+        if ctk_img:
+            label.configure(image=ctk_img, text="")
+            label.image = ctk_img
+            return None
+
+        future = image_pool.submit(load_image, url, size)
+
+        def deliver(f):
+            if f.cancelled() or f.exception():
+                return
+            img = f.result()
+            self.after(0, lambda: self._show_image(label, url, img, size, generation))
+
+        future.add_done_callback(deliver)
+        return future
+
+    def _show_image(self, label, url, img, size, generation):
+        ctk_img = make_ctk_image(img, size) if img else None
+        if ctk_img:
+            image_cache_for(size).put((url, size), ctk_img, image_bytes(img))
+        if generation is not None and generation != self.render_generation:
+            return
+        if not label.winfo_exists():
+            return
+        if ctk_img:
+            label.configure(image=ctk_img, text="")
+            label.image = ctk_img
+        else:
+            label.configure(text="No Image")
+
+    def cancel_prefetch(self):
+        for future in self.prefetch_futures:
+            future.cancel()
+        self.prefetch_futures = []
+
+    def prefetch_adjacent(self):
+        """Warms the page cache and card images for the PREFETCH_DEPTH pages on each side of the current one"""
+        self.cancel_prefetch()
+        generation = self.results_generation
+        params = dict(self.search_params)
+        last_page = (self.total_results - 1) // ITEMS_PER_PAGE
+        for d in range(1, PREFETCH_DEPTH + 1):
+            for page in (self.current_page + d, self.current_page - d):
+                if 0 <= page <= last_page:
+                    if self.startup_snapshot is not None and page not in self.page_cache:
+                        self.page_cache[page] = self.snapshot_page(page)
+                    self.prefetch_futures.append(
+                        prefetch_pool.submit(self._prefetch_page, page, params, self.page_cache.get(page), generation))
+
+    def _prefetch_page(self, page, params, items, generation):
+        """Runs on the prefetch pool: fetches the page's anime if needed, then its covers"""
+        if items is None:
+            items, _ = catalogue.search_page(**params, offset=page * ITEMS_PER_PAGE, limit=ITEMS_PER_PAGE)
+            self.after(0, lambda: generation == self.results_generation and self.page_cache.setdefault(page, items))
+
+        for anime in items:
+            if generation != self.results_generation:
+                return
+            url = anime.get("image")
+            if not url or (url, CARD_IMAGE_SIZE) in card_images:
+                continue
+            img = load_image(url, CARD_IMAGE_SIZE)
+            if img is not None:
+                self.after(0, lambda url=url, img=img: self._store_prefetched(url, img, generation))
+
+    def _store_prefetched(self, url, img, generation):
+        if generation != self.results_generation:
+            return
+        ctk_img = make_ctk_image(img, CARD_IMAGE_SIZE)
+        if ctk_img:
+            card_images.put((url, CARD_IMAGE_SIZE), ctk_img, image_bytes(img))
 
     def render_page(self):
-        for w in self.cards_frame.winfo_children():
-            w.destroy()
-
-        total = len(self.current_results)
+        started = time.perf_counter()
+        total = self.total_results
         total_pages = max(1, (total + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE)
         self.page_label.configure(text=f"Page {self.current_page + 1} / {total_pages}")
 
-        start = self.current_page * ITEMS_PER_PAGE
-        end = start + ITEMS_PER_PAGE
-        page_items = self.current_results[start:end]
-
-        cols = 3
-        row = None
-        for i, anime in enumerate(page_items):
-            if i % cols == 0:
-                row = ctk.CTkFrame(self.cards_frame, fg_color="transparent")
-                row.pack(fill="x", pady=10, padx=10)
-
-            card = ctk.CTkFrame(row, width=360, height=600, corner_radius=18, border_width=1, border_color="#333")
-            card.pack(side="left", padx=15, pady=10)
-            card.pack_propagate(False)
-
-            img = cache_image(anime.get("image"))
-            if img:
-                ctk_img = make_ctk_image(img, size=(280, 400))
-                lbl = ctk.CTkLabel(card, image=ctk_img, text="")
-                lbl.image = ctk_img
-                lbl.pack(pady=(15, 8))
-            else:
-                ctk.CTkLabel(card, text="No Image", text_color="#666").pack(pady=120)
-
-            ctk.CTkLabel(card, text=anime.get("title", "Unknown"),
-                         font=ctk.CTkFont(size=17, weight="bold"),
-                         wraplength=300, justify="center").pack(pady=(10, 5))
-
-            meta = f"{anime.get('score', 'N/A')} • {anime.get('year', '????')} • {anime.get('episodes', '?')} eps"
-            ctk.CTkLabel(card, text=meta, text_color="#BBBBBB").pack(pady=2)
-
-            genres_txt = ", ".join(anime.get("genres", [])[:4])
-            if len(anime.get("genres", [])) > 4: genres_txt += "..."
-            ctk.CTkLabel(card, text=genres_txt, font=ctk.CTkFont(size=11), wraplength=300).pack(pady=8)
-
-            ctk.CTkButton(card, text="More Details", width=240, height=40,
-                          command=lambda a=anime: self.open_details(a)).pack(side="bottom", pady=18)
+        end = (self.current_page + 1) * ITEMS_PER_PAGE
+        self.page_items = self.current_results
+        self.first_row = 0
+        bind_started = time.perf_counter()
+        self.bind_rows()
+        bound = time.perf_counter()
 
         self.prev_btn.configure(state="normal" if self.current_page > 0 else "disabled")
         self.next_btn.configure(state="normal" if end < total else "disabled")
+        self.prefetch_adjacent()
+        finished = time.perf_counter()
+        self.last_render_ms = (finished - started) * 1000
+
+        queued = len(self.image_futures)
+        self.last_render = {
+            "total_ms": self.last_render_ms,
+            "bind_ms": (bound - bind_started) * 1000,
+            "prefetch_ms": (finished - bound) * 1000,
+            "covers_queued": queued,
+            "covers_cached": sum(1 for _, cards in self.card_rows for card in cards
+                                 if card.anime and card.anime.get("image")) - queued,
+        }
+        if metrics.ENABLED:
+            metrics.observe("render.total", finished - started)
+            metrics.observe("render.bind", bound - bind_started)
+
+    def bind_rows(self):
+        """Re-binds the card pool to page_items, starting at first_row"""
+        # Covers still queued for what the pool showed before are no longer wanted
+        self.render_generation += 1
+        for future in self.image_futures:
+            future.cancel()
+        self.image_futures = []
+
+        for r, (row, cards) in enumerate(self.card_rows):
+            start = (self.first_row + r) * CARD_COLUMNS
+            items = self.page_items[start:start + CARD_COLUMNS]
+            if not items:
+                for card in cards:
+                    card.hide()
+                row.pack_forget()
+                continue
+            row.pack(fill="x", pady=10, padx=10)
+            for i, card in enumerate(cards):
+                if i < len(items):
+                    future = card.bind(items[i], self.render_generation)
+                    if future:
+                        self.image_futures.append(future)
+                else:
+                    card.hide()
+
+        if VIRTUAL_SCROLL:
+            total_rows = max(1, (len(self.page_items) + CARD_COLUMNS - 1) // CARD_COLUMNS)
+            self.cards_scrollbar.set(self.first_row / total_rows,
+                                     min(1.0, (self.first_row + VISIBLE_ROWS) / total_rows))
+
+    def scroll_to_row(self, first_row):
+        total_rows = (len(self.page_items) + CARD_COLUMNS - 1) // CARD_COLUMNS
+        first_row = max(0, min(first_row, total_rows - VISIBLE_ROWS))
+        if first_row != self.first_row:
+            self.first_row = first_row
+            self.bind_rows()
+
+    def on_virtual_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            total_rows = (len(self.page_items) + CARD_COLUMNS - 1) // CARD_COLUMNS
+            self.scroll_to_row(round(float(amount) * total_rows))
+        else:
+            step = VISIBLE_ROWS if unit == "pages" else 1
+            self.scroll_to_row(self.first_row + int(amount) * step)
+
+    def on_mouse_wheel(self, event):
+        # bind_all also sees wheel events from the details and update windows
+        if not hasattr(event.widget, "winfo_toplevel") or event.widget.winfo_toplevel() is not self:
+            return
+        down = event.num == 5 or event.delta < 0
+        self.scroll_to_row(self.first_row + (1 if down else -1))
+
     def open_details(self, anime):
         win = ctk.CTkToplevel(self)
         win.title(anime.get("title", "Details"))
         win.geometry("800x950")
 
-        # Build content first
-        img = cache_image(anime.get("image"))
-        if img:
-            ctk_img = make_ctk_image(img, size=(440, 620))
-            ctk.CTkLabel(win, image=ctk_img, text="").pack(pady=15)
+        # Build content first, the cover arrives from the image pool
+        img_lbl = ctk.CTkLabel(win, text="Loading...", font=ctk.CTkFont(size=16),
+                               width=DETAIL_IMAGE_SIZE[0], height=DETAIL_IMAGE_SIZE[1])
+        img_lbl.pack(pady=15)
+        if anime.get("image"):
+            self.load_image_async(img_lbl, anime.get("image"), DETAIL_IMAGE_SIZE)
         else:
-            ctk.CTkLabel(win, text="No Image", font=ctk.CTkFont(size=16)).pack(pady=50)
+            img_lbl.configure(text="No Image")
 
         ctk.CTkLabel(win, text=anime.get("title", ""), font=ctk.CTkFont(size=26, weight="bold"),
                      text_color=PALETTE[3]).pack(pady=(0, 12))
 
-        info = f"Score: {anime.get('score','—')}  |  Year: {anime.get('year','—')}  |  Episodes: {anime.get('episodes','—')}\n" \
-               f"Rating: {anime.get('rating','—')}  |  Studio: {anime.get('studios','—')}"
-        ctk.CTkLabel(win, text=info, font=ctk.CTkFont(size=14)).pack(pady=10)
+        info_lbl = ctk.CTkLabel(win, text=self.details_info(anime), font=ctk.CTkFont(size=14))
+        info_lbl.pack(pady=10)
         ctk.CTkLabel(win, text="Genres: " + ", ".join(anime.get("genres", []))).pack(pady=5)
 
+        # Cards only carry list-view fields: the whole anime (synopsis, rating etc.) and the
+        # version it was last written at are fetched now, off the Tk thread
+        current = {"anime": anime, "version": None}
         btns = ctk.CTkFrame(win)
         btns.pack(pady=15)
-        ctk.CTkButton(btns, text="Update", fg_color="#00A86B",
-                      command=lambda: self.show_update_form(anime, win)).pack(side="left", padx=20)
+        update_btn = ctk.CTkButton(btns, text="Update", fg_color="#00A86B", state="disabled",
+                                   command=lambda: self.show_update_form(current["anime"], win, current["version"]))
+        update_btn.pack(side="left", padx=20)
         ctk.CTkButton(btns, text="Delete", fg_color="#FF3333",
                       command=lambda: self.confirm_delete(anime, win)).pack(side="left", padx=20)
 
         syn = ctk.CTkTextbox(win, width=720, height=180, wrap="word")
         syn.pack(padx=20, pady=10)
-        syn.insert("0.0", anime.get("synopsis", "No synopsis available."))
+        syn.insert("0.0", "Loading details...")
         syn.configure(state="disabled")
 
+        future = search_pool.submit(catalogue.get_for_update, anime.get("id"))
+        future.add_done_callback(lambda f: self.after(
+            0, lambda: self._show_details(f, win, current, info_lbl, syn, update_btn)))
+
 
         # Make modal only after everything is built
         win.transient(self)
         win.grab_set()
 
-    def show_update_form(self, anime, details_win):
+    def details_info(self, anime):
+        return f"Score: {anime.get('score','—')}  |  Year: {anime.get('year','—')}  |  Episodes: {anime.get('episodes','—')}\n" \
+               f"Rating: {anime.get('rating') or '—'}  |  Studio: {anime.get('studios') or '—'}"
+
+    def _show_details(self, future, win, current, info_lbl, syn, update_btn):
+        if not win.winfo_exists():
+            return
+        if future.exception() is not None:
+            text = f"Could not load details: {future.exception()}"
+        elif future.result()[0] is None:
+            text = "This anime no longer exists."
+        else:
+            current["anime"], current["version"] = future.result()
+            text = current["anime"].get("synopsis") or "No synopsis available."
+            info_lbl.configure(text=self.details_info(current["anime"]))
+            # Only now does the form have every field it will save back
+            update_btn.configure(state="normal")
+        syn.configure(state="normal")
+        syn.delete("0.0", "end")
+        syn.insert("0.0", text)
+        syn.configure(state="disabled")
+
+    def show_update_form(self, anime, details_win, based_on):
+        """based_on: version anime was read at; the save is refused if someone else changed it since"""
         details_win.destroy()
         win = ctk.CTkToplevel(self)
         win.title(f"Update – {anime.get('title')}")
@@ -386,14 +1121,33 @@ class AnimeApp(ctk.CTk):
                 "genres": [g.strip() for g in entries["genres"].get().split(",") if g.strip()],
                 "synopsis": entries["synopsis"].get("0.0", "end").strip() or None,
             }
-            if redis_db.update_anime(anime.get("id"), new_data):
+            save_btn.configure(state="disabled")
+            self.on_worker(lambda: catalogue.update_many([(anime.get("id"), new_data)], based_on)[anime.get("id")],
+                           saved)
+
+        def saved(future):
+            # The form may have been cancelled while the write was under way
+            if win.winfo_exists():
+                save_btn.configure(state="normal")
+            if future.exception() is not None:
+                msgbox.showerror("Error", f"Update failed:\n{future.exception()}")
+                return
+            outcome = future.result()
+            if outcome in ("updated", "unchanged"):
                 msgbox.showinfo("Success", "Updated successfully!")
-                win.destroy()
-                threading.Thread(target=self.load_all_anime, daemon=True).start()
+            elif outcome == "conflict":
+                msgbox.showwarning("Changed Elsewhere",
+                                   "Someone else changed this anime after it was loaded.\n"
+                                   "Reopen it to see their version, then apply your edit again.")
+            if outcome in ("updated", "unchanged", "conflict"):
+                if win.winfo_exists():
+                    win.destroy()
+                self.after_write()
             else:
-                msgbox.showerror("Error", "Update failed")
+                msgbox.showerror("Error", "Update failed: the anime no longer exists.")
 
-        ctk.CTkButton(btns, text="Save Changes", width=180, fg_color="#00A86B", command=save).pack(side="left", padx=25)
+        save_btn = ctk.CTkButton(btns, text="Save Changes", width=180, fg_color="#00A86B", command=save)
+        save_btn.pack(side="left", padx=25)
         ctk.CTkButton(btns, text="Cancel", width=180, command=win.destroy).pack(side="left", padx=25)
 
         win.transient(self)
@@ -401,24 +1155,30 @@ class AnimeApp(ctk.CTk):
 
     def confirm_delete(self, anime, win):
         if msgbox.askyesno("Delete?", f"Delete {anime.get('title')}?"):
-            if redis_db.delete_anime(anime.get("id")):
-                msgbox.showinfo("Deleted", "Anime removed.")
-            else:
-                msgbox.showerror("Error", "Delete failed.")
+            self.on_worker(lambda: catalogue.delete_anime(anime.get("id")), lambda f: self._deleted(f, win))
+
+    def _deleted(self, future, win):
+        if future.exception() is not None:
+            msgbox.showerror("Error", f"Delete failed:\n{future.exception()}")
+            return
+        if future.result():
+            msgbox.showinfo("Deleted", "Anime removed.")
+        else:
+            msgbox.showerror("Error", "Delete failed.")
+        if win.winfo_exists():
             win.destroy()
-            threading.Thread(target=self.load_all_anime, daemon=True).start()
+        self.after_write()
 
     def next_page(self):
-        if (self.current_page + 1) * ITEMS_PER_PAGE < len(self.current_results):
-            self.current_page += 1
-            self.render_page()
+        if (self.current_page + 1) * ITEMS_PER_PAGE < self.total_results:
+            self.show_page(self.current_page + 1)
 
     def prev_page(self):
         if self.current_page > 0:
-            self.current_page -= 1
-            self.render_page()
+            self.show_page(self.current_page - 1)
 
 # ----------------- Run -----------------
 if __name__ == "__main__":
+    metrics.start()
     app = AnimeApp()
     app.mainloop()
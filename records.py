@@ -0,0 +1,88 @@
+# records.py
+# Compact, typed in-memory form of one anime hash.
+import sys
+from collections.abc import Mapping
+
+TEXT_FIELDS = ("title", "title_english", "title_japanese", "synopsis", "image")
+# Low-cardinality strings shared by many records, interned so each value is stored once
+SHARED_FIELDS = ("duration", "rating", "themes", "studios")
+NUMBER_FIELDS = {"year": int, "episodes": int, "score": float}
+FIELDS = ("id",) + TEXT_FIELDS + SHARED_FIELDS + tuple(NUMBER_FIELDS) + ("genres",)
+TITLE_FIELDS = ("title", "title_english", "title_japanese")
+
+
+def normalize_title(text):
+    return " ".join((text or "").lower().split())
+
+
+def title_matches(anime, query):
+    """Same rule as a lookup in redis_db's title index: query starts at a word start, or anywhere in Japanese"""
+    query = normalize_title(query)
+    if not query:
+        return True
+    for field in TITLE_FIELDS:
+        text = normalize_title(anime.get(field))
+        i = text.find(query)
+        while i != -1:
+            if i == 0 or text[i - 1] == " " or ord(text[i]) > 0x2E7F:
+                return True
+            i = text.find(query, i + 1)
+    return False
+
+
+def _to_number(value, kind):
+    if value in (None, ""):
+        return None
+    try:
+        return kind(float(value)) if kind is int else kind(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class AnimeRecord(Mapping):
+    """
+    One anime with parsed numbers, interned genre/studio strings and a pre-lowercased
+    sort title. Reads like the old dict (anime["title"], anime.get("score", "N/A")),
+    but unknown numbers are simply absent instead of "".
+    """
+
+    __slots__ = FIELDS + ("sort_title",)
+
+    def __init__(self, **fields):
+        for name in TEXT_FIELDS:
+            setattr(self, name, fields.get(name) or "")
+        for name in SHARED_FIELDS:
+            setattr(self, name, sys.intern(str(fields.get(name) or "")))
+        for name, kind in NUMBER_FIELDS.items():
+            setattr(self, name, _to_number(fields.get(name), kind))
+        genres = fields.get("genres") or ()
+        if isinstance(genres, str):
+            genres = genres.split(",")
+        self.genres = tuple(sys.intern(g.strip()) for g in genres if g.strip())
+        self.id = fields.get("id") or ""
+        self.sort_title = self.title.lower()
+
+    @classmethod
+    def from_hash(cls, key, raw):
+        """Builds a record from the strings HGETALL returns"""
+        return cls(id=key, **{k: v for k, v in raw.items() if k in FIELDS and k != "id"})
+
+    def replace(self, **changes):
+        return AnimeRecord(**{**dict(self), **changes})
+
+    def __getitem__(self, name):
+        if name not in FIELDS:
+            raise KeyError(name)
+        value = getattr(self, name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __iter__(self):
+        return (name for name in FIELDS if getattr(self, name) is not None)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"AnimeRecord(id={self.id!r}, title={self.title!r})"
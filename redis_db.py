@@ -1,110 +1,882 @@
 # redis_db.py
 import redis
 import json
+import os
+import threading
+import time
+import uuid
 
-r = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+import columnar
+import metrics
+import redis_pool
+import snapshot_file
+import storage
+import text_index
+from records import TITLE_FIELDS, AnimeRecord, normalize_title
 
-def _parse_anime(data):
-    """Helper: converts stored string → proper types"""
+r = redis_pool.client()
+
+# How many keys SCAN asks for per cursor step, and how many HGETALLs go out per pipeline.
+SCAN_BATCH_SIZE = 500
+UPDATE_BATCH_SIZE = 200        # records patched per WATCH/MULTI transaction by update_many
+
+# Secondary indexes kept next to the anime:* hashes
+GENRE_INDEX = "idx:genre:{}"   # set of anime keys per lowercased genre
+YEAR_INDEX = "idx:year"        # sorted set of anime keys scored by year
+TITLE_INDEX = "idx:title"      # lex sorted set of "<title suffix>\x00<anime key>"
+FULLTEXT_LIMIT = 200           # ranked hits kept by a full-text search
+
+# Sorted sets holding every anime, for server-side ordering and pagination.
+# Title is ascending; the numeric ones are descending with unknown values (-inf) last.
+SORT_INDEX = "idx:sort:{}"
+SORT_FIELDS = ("title", "score", "year", "episodes")
+TITLE_SORT_CHARS = 10          # leading characters of the title that decide its sort score
+
+# Change tracking for the in-process cache
+VERSION_KEY = "meta:version"        # bumped by every write to the catalogue
+CHANGES_KEY = "meta:changes"        # sorted set of anime keys scored by the version that last touched them
+CHANGES_FLOOR_KEY = "meta:floor"    # caches older than this version must reload everything
+DATASET_KEY = "meta:dataset"        # random id of this catalogue, new on every reset; versions only compare within one
+# Stream with one event per version: v, op (update, delete, genre, seed or reset) and keys, comma separated.
+# Running clients follow it to pick up each other's writes (see read_feed / apply_changes).
+FEED_KEY = "meta:feed"
+FEED_MAXLEN = 10_000                # events kept, roughly; a client further behind than that resyncs
+FEED_BLOCK_MS = 2000                # longest a read_feed waits, well inside the pool's socket timeout
+
+# KEYS: version, changes, floor, feed, dataset
+# ARGV: op ("reset" starts over), feed length, a fresh dataset id, then the changed anime keys
+_record_change_script = r.register_script("""
+local v = redis.call('INCR', KEYS[1])
+if ARGV[1] == 'reset' then
+    redis.call('DEL', KEYS[2])
+    redis.call('SET', KEYS[3], v)
+    redis.call('SET', KEYS[5], ARGV[3])
+else
+    redis.call('SETNX', KEYS[5], ARGV[3])
+end
+for i = 4, #ARGV do
+    redis.call('ZADD', KEYS[2], v, ARGV[i])
+end
+redis.call('XADD', KEYS[4], 'MAXLEN', '~', ARGV[2], '*', 'v', v, 'op', ARGV[1], 'keys', table.concat(ARGV, ',', 4))
+return v
+""")
+
+# KEYS: genre index set, version, changes, feed  ARGV: genre, lowercased genre, feed length
+# Strips the genre from every anime in its index set in one atomic pass and logs the change.
+_remove_genre_script = r.register_script("""
+local affected = {}
+for _, key in ipairs(redis.call('SMEMBERS', KEYS[1])) do
+    local stored = redis.call('HGET', key, 'genres')
+    local kept, removed, still_indexed = {}, false, false
+    for g in string.gmatch(stored or '', '[^,]+') do
+        g = string.match(g, '^%s*(.-)%s*$')
+        if g == ARGV[1] then
+            removed = true
+        elseif g ~= '' then
+            table.insert(kept, g)
+            if string.lower(g) == ARGV[2] then still_indexed = true end
+        end
+    end
+    if removed then
+        redis.call('HSET', key, 'genres', table.concat(kept, ','))
+        table.insert(affected, key)
+    end
+    if not still_indexed then
+        redis.call('SREM', KEYS[1], key)
+    end
+end
+local v = 0
+if #affected > 0 then
+    v = redis.call('INCR', KEYS[2])
+    for _, key in ipairs(affected) do
+        redis.call('ZADD', KEYS[3], v, key)
+    end
+    redis.call('XADD', KEYS[4], 'MAXLEN', '~', ARGV[3], '*', 'v', v, 'op', 'genre', 'keys', table.concat(affected, ','))
+end
+return {v, affected}
+""")
+
+# Process-local copy of the parsed catalogue, shared by every reader below
+_cache = {}             # anime key -> parsed anime
+_cache_version = None   # VERSION_KEY value the cache reflects, None until first load
+_cache_dataset = None   # DATASET_KEY of the catalogue the cache holds
+_cache_lock = threading.RLock()
+_snapshot = None        # columnar.CatalogueSnapshot of the cache, rebuilt when the cache moves on
+_offline_until = 0.0    # while Redis is unreachable, monotonic time of the next attempt to reach it
+
+# Local copy of the catalogue for a cold start before (or without) Redis, see snapshot_file
+SNAPSHOT_PATH = snapshot_file.PATH
+OFFLINE_RETRY_SECONDS = 10
+
+def reset_cache():
+    """Forgets the in-process cache, so the next read loads the catalogue from scratch"""
+    global _cache, _cache_version, _cache_dataset, _snapshot
+    with _cache_lock:
+        _cache, _cache_version, _cache_dataset, _snapshot = {}, None, None, None
+
+def use_client(client):
+    """Points every function here at another Redis (e.g. a benchmark database) and drops the cache"""
+    global r, _record_change_script, _remove_genre_script
+    r = client
+    _record_change_script = client.register_script(_record_change_script.script)
+    _remove_genre_script = client.register_script(_remove_genre_script.script)
+    reset_cache()
+
+def _parse_anime(data, key=""):
+    """Helper: converts stored strings → a typed AnimeRecord"""
     if not data:
         return None
-    if 'genres' in data and data['genres']:
-        data['genres'] = [g.strip() for g in data['genres'].split(',') if g.strip()]
-    else:
-        data['genres'] = []
-    
-    # Extract ID from key
-    data['id'] = data.get('id') or ""
-    return data
+    return AnimeRecord.from_hash(key, data)
 
-def get_all_anime():
-    keys = r.keys("anime:*")
-    anime_list = []
+def _load_batch(keys, full=False):
+    """
+    Fetches a batch of anime in one pipelined round trip.
+    Only the hot fields (see storage) unless full, which adds the unpacked details.
+    """
+    if full:
+        for key, raw in zip(keys, storage.fetch_full(r, keys)):
+            if raw:
+                yield _parse_anime(raw, key)
+        return
+    pipe = r.pipeline(transaction=False)
     for key in keys:
-        raw = r.hgetall(key)
+        storage.queue_hot(pipe, key)
+    for key, values in zip(keys, pipe.execute()):
+        raw = storage.hot_from_reply(values)
         if raw:
-            anime = _parse_anime(raw)
-            anime['id'] = key  # full key like "anime:12345"
-            anime_list.append(anime)
-    return anime_list
+            yield _parse_anime(raw, key)  # id is the full key like "anime:12345"
+
+def _scan_batches(batch_size=SCAN_BATCH_SIZE):
+    """Every anime key, batch_size at a time, walked with a SCAN cursor"""
+    seen = set()  # SCAN may hand back the same key twice
+    batch = []
+    for key in r.scan_iter(match="anime:*", count=batch_size, _type="hash"):
+        if key in seen:
+            continue
+        seen.add(key)
+        batch.append(key)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_anime(batch_size=SCAN_BATCH_SIZE, full=False):
+    """
+    Yields every anime without blocking Redis.
+    Keys are walked with a SCAN cursor and fetched batch_size at a time.
+    """
+    for batch in _scan_batches(batch_size):
+        yield from _load_batch(batch, full)
+
+def record_change(client, keys, reset=False, op="update"):
+    """
+    Bumps the catalogue version, logs the changed keys and appends them to the feed, atomically.
+    Queue it on the same MULTI pipeline as the write it describes; op names the write in the feed.
+    reset=True tells every cache to reload from scratch (e.g. before a reseed) and gives the
+    catalogue a new dataset id; the first write to a new catalogue gives it its first one.
+    """
+    args = ["reset" if reset else op, FEED_MAXLEN, uuid.uuid4().hex] + list(keys)
+    return _record_change_script(keys=[VERSION_KEY, CHANGES_KEY, CHANGES_FLOOR_KEY, FEED_KEY, DATASET_KEY],
+                                 args=args, client=client)
+
+def feed_position():
+    """ID of the newest feed event: read_feed from here to see only what happens next"""
+    newest = r.xrevrange(FEED_KEY, count=1)
+    return newest[0][0] if newest else "0-0"
+
+def read_feed(last_id, block_ms=FEED_BLOCK_MS, count=1000):
+    """
+    Feed events after last_id, waiting up to block_ms for the first one.
+    Returns (the ID to read from next time, [(version, op, keys), ...]).
+    """
+    reply = r.xread({FEED_KEY: last_id}, count=count, block=block_ms)
+    streams = reply.items() if isinstance(reply, dict) else reply or []  # RESP3 hands back a dict
+    events = []
+    for _, entries in streams:
+        for event_id, fields in entries:
+            last_id = event_id
+            events.append((int(fields["v"]), fields["op"], [k for k in fields["keys"].split(",") if k]))
+    return last_id, events
+
+def apply_changes(events, seen_version=None, batch_size=SCAN_BATCH_SIZE):
+    """
+    Brings the cache forward by feed events, refetching only the keys they name.
+    seen_version: version of the last event the caller read before these, if any.
+    Returns the keys the events touched, or None when they call for a full refresh: after
+    a reseed, or when events went missing (trimmed, or lost while disconnected) and the
+    cache was resynced instead.
+    """
+    global _cache_version
+    touched = set()
+    for _, op, keys in events:
+        if op == "reset":
+            touched = None
+            break
+        touched.update(keys)
+    if touched is not None and seen_version is not None and events and events[0][0] != seen_version + 1:
+        touched = None
+
+    with _cache_lock:
+        if _cache_version is None:
+            return set()  # nothing loaded yet, and the first read loads everything anyway
+        new = [event for event in events if event[0] > _cache_version]
+        contiguous = [version for version, _, _ in new] == list(range(_cache_version + 1, _cache_version + 1 + len(new)))
+        if touched is None or not contiguous:
+            _sync_cache(batch_size)
+            return None
+        keys = list(dict.fromkeys(key for _, _, event_keys in new for key in event_keys))
+        for i in range(0, len(keys), batch_size):
+            batch = keys[i:i + batch_size]
+            for key in batch:
+                _cache.pop(key, None)
+            for anime in _load_batch(batch):
+                _cache[anime["id"]] = anime
+        if new:
+            _cache_version = new[-1][0]
+    return touched
+
+def cached_anime(keys):
+    """{key: anime, or None if it's gone} straight from the cache, without syncing it"""
+    with _cache_lock:
+        return {key: _cache.get(key) for key in keys}
+
+@metrics.timed("redis_db.sync_cache")
+def _sync_cache(batch_size=SCAN_BATCH_SIZE):
+    """Brings the cache up to date, refetching only the keys changed since the last sync"""
+    global _cache, _cache_version, _cache_dataset, _offline_until
+    with _cache_lock:
+        if _cache_version is not None and time.monotonic() < _offline_until:
+            return
+        try:
+            version, floor, dataset = r.mget(VERSION_KEY, CHANGES_FLOOR_KEY, DATASET_KEY)
+            if dataset is None:  # never written through record_change (e.g. an empty or older database)
+                r.set(DATASET_KEY, uuid.uuid4().hex, nx=True)
+                dataset = r.get(DATASET_KEY)
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            # With a cache to fall back on (e.g. one loaded from a snapshot file) keep serving it
+            if _cache_version is None:
+                raise
+            if not _offline_until:
+                print(f"⚠️ Redis unreachable, serving the cached catalogue: {e}")
+            _offline_until = time.monotonic() + OFFLINE_RETRY_SECONDS
+            return
+        _offline_until = 0.0
+        version, floor = int(version or 0), int(floor or 0)
+
+        # Versions mean nothing across datasets (another database, a flush, a reseed); a version
+        # that went backwards means Redis restarted without its data, or was restored
+        if (_cache_version is None or dataset != _cache_dataset
+                or _cache_version < floor or version < _cache_version):
+            _cache = {anime["id"]: anime for anime in iter_anime(batch_size)}
+        elif version != _cache_version:
+            changed = r.zrangebyscore(CHANGES_KEY, f"({_cache_version}", "+inf")
+            for i in range(0, len(changed), batch_size):
+                keys = changed[i:i + batch_size]
+                for key in keys:
+                    _cache.pop(key, None)
+                for anime in _load_batch(keys):
+                    _cache[anime["id"]] = anime
+        _cache_version, _cache_dataset = version, dataset
+
+def _patch_cache(version, changes):
+    """Applies our own write to the cache; changes maps key -> new anime, or None if deleted"""
+    global _cache_version
+    with _cache_lock:
+        # Only safe if nobody else wrote in between, otherwise the next sync catches up
+        if _cache_version is None or _cache_version != version - 1:
+            return
+        for key, anime in changes.items():
+            if anime is None:
+                _cache.pop(key, None)
+            else:
+                _cache[key] = anime
+        _cache_version = version
+
+def _current_snapshot():
+    """Columnar view of the synced cache for vectorized filtering; None without NumPy"""
+    global _snapshot
+    if columnar.np is None:
+        return None
+    _sync_cache()
+    with _cache_lock:
+        if _snapshot is None or _snapshot.version != _cache_version:
+            with metrics.timer("columnar.build"):
+                _snapshot = columnar.CatalogueSnapshot(_cache.values(), _cache_version)
+        return _snapshot
+
+def catalogue_version():
+    """Version of the catalogue the cache reflects, after syncing it"""
+    _sync_cache()
+    return _cache_version
+
+def catalogue_dataset():
+    """DATASET_KEY of the catalogue the cache reflects, after syncing it"""
+    _sync_cache()
+    return _cache_dataset
+
+def is_offline():
+    """True while reads are served from the cache because Redis can't be reached"""
+    return _offline_until > 0
+
+@metrics.timed("redis_db.export_snapshot")
+def export_snapshot(path=SNAPSHOT_PATH):
+    """Writes the synced catalogue to a snapshot file; returns how many anime it holds"""
+    _sync_cache()
+    with _cache_lock:
+        records, version, dataset = list(_cache.values()), _cache_version, _cache_dataset
+    orders = {field: sorted(range(len(records)), key=lambda i, key=_sort_key(field): key(records[i]))
+              for field in SORT_FIELDS}
+    genres = sorted({genre for anime in records for genre in anime.genres})
+    snapshot_file.write(path, records, version, orders, genres, dataset)
+    return len(records)
+
+@metrics.timed("redis_db.load_snapshot")
+def load_snapshot(snapshot, close=True):
+    """
+    Seeds an empty cache from an open snapshot (and closes it unless close=False), so the next
+    sync only fetches what changed in Redis since the file was written. A snapshot of another
+    dataset is only served until then: that sync reloads everything. False if the cache was already loaded.
+    """
+    global _cache, _cache_version, _cache_dataset
+    try:
+        records, version, dataset = snapshot.records(), snapshot.version, snapshot.dataset
+    finally:
+        if close:
+            snapshot.close()
+    with _cache_lock:
+        if _cache_version is not None:
+            return False
+        _cache = {anime.id: anime for anime in records}
+        _cache_version, _cache_dataset = version, dataset
+    return True
+
+@metrics.timed("redis_db.get_all_anime")
+def get_all_anime(batch_size=SCAN_BATCH_SIZE):
+    _sync_cache(batch_size)
+    with _cache_lock:
+        return list(_cache.values())
+
+def _genre_list(value):
+    """Genres come either as the stored comma string or as an already parsed list"""
+    if isinstance(value, (list, tuple)):
+        return value
+    return [g.strip() for g in (value or "").split(",") if g.strip()]
+
+def _year_of(anime):
+    try:
+        return int(anime.get("year")) if anime.get("year") else None
+    except (TypeError, ValueError):
+        return None
+
+def _title_entries(key, anime):
+    """
+    One index entry per place a title search may start: every word start,
+    and every character for scripts written without spaces (e.g. Japanese).
+    """
+    entries = set()
+    for field in TITLE_FIELDS:
+        text = normalize_title(anime.get(field))
+        for i, ch in enumerate(text):
+            if ch == " ":
+                continue
+            if i == 0 or text[i - 1] == " " or ord(ch) > 0x2E7F:
+                entries.add(f"{text[i:]}\x00{key}")
+    return entries
+
+def _number(value):
+    try:
+        return float(value) if value not in (None, "") else float("-inf")
+    except (TypeError, ValueError):
+        return float("-inf")
+
+def _title_sort_score(title):
+    """
+    Packs the first TITLE_SORT_CHARS characters into a float that orders like the lowercased title:
+    separators < digits < letters, 37 symbols per position, 10 positions fit a double exactly.
+    """
+    score = 0
+    for ch in (title or "").lower()[:TITLE_SORT_CHARS].ljust(TITLE_SORT_CHARS):
+        if "0" <= ch <= "9":
+            code = 1 + ord(ch) - ord("0")
+        elif "a" <= ch <= "z":
+            code = 11 + ord(ch) - ord("a")
+        else:
+            code = 0
+        score = score * 37 + code
+    return float(score)
+
+def _sort_scores(anime):
+    return {
+        "title": _title_sort_score(anime.get("title")),
+        "score": _number(anime.get("score")),
+        "year": _number(anime.get("year")),
+        "episodes": _number(anime.get("episodes")),
+    }
+
+def index_anime(pipe, key, anime, prefix=""):
+    """
+    Queues the genre/year/title index entries of one anime on pipe.
+    prefix places the index keys elsewhere (e.g. a staging area); entries still name key.
+    """
+    for g in _genre_list(anime.get("genres")):
+        pipe.sadd(prefix + GENRE_INDEX.format(g.lower()), key)
+    year = _year_of(anime)
+    if year is not None:
+        pipe.zadd(prefix + YEAR_INDEX, {key: year})
+    entries = _title_entries(key, anime)
+    if entries:
+        pipe.zadd(prefix + TITLE_INDEX, {e: 0 for e in entries})
+    for field, score in _sort_scores(anime).items():
+        pipe.zadd(prefix + SORT_INDEX.format(field), {key: score})
+    text_index.index_document(pipe, key, anime, prefix)
+
+def unindex_anime(pipe, key, anime, prefix=""):
+    """Queues removal of everything index_anime added for this anime"""
+    for g in _genre_list(anime.get("genres")):
+        pipe.srem(prefix + GENRE_INDEX.format(g.lower()), key)
+    pipe.zrem(prefix + YEAR_INDEX, key)
+    entries = _title_entries(key, anime)
+    if entries:
+        pipe.zrem(prefix + TITLE_INDEX, *entries)
+    for field in SORT_FIELDS:
+        pipe.zrem(prefix + SORT_INDEX.format(field), key)
+    text_index.unindex_document(pipe, key, anime, prefix)
 
+def clear_indexes(client):
+    keys = list(client.scan_iter(match="idx:*", count=SCAN_BATCH_SIZE))
+    for i in range(0, len(keys), SCAN_BATCH_SIZE):
+        client.delete(*keys[i:i + SCAN_BATCH_SIZE])
+
+def rebuild_indexes(batch_size=SCAN_BATCH_SIZE):
+    """Drops and rebuilds every secondary index from the anime:* hashes"""
+    clear_indexes(r)
+    count = 0
+    pipe = r.pipeline(transaction=False)
+    for anime in iter_anime(batch_size, full=True):  # the full-text index needs the details too
+        index_anime(pipe, anime["id"], anime)
+        count += 1
+        if count % batch_size == 0:
+            pipe.execute()
+    pipe.execute()
+    return count
+
+def migrate_storage(fmt=storage.FORMAT, batch_size=SCAN_BATCH_SIZE):
+    """
+    Rewrites every anime hash in storage format fmt. Contents, indexes and the catalogue
+    version stay as they are, so readers carry on meanwhile. A batch that some writer
+    touches mid-way is read and rewritten again. Returns how many anime were rewritten.
+    """
+    if fmt not in storage.FORMATS:
+        raise ValueError(f"fmt must be one of {storage.FORMATS}")
+    count = 0
+    with r.pipeline() as pipe:
+        for keys in _scan_batches(batch_size):
+            while True:
+                try:
+                    pipe.watch(*keys)
+                    entries = [(key, entry) for key, entry in zip(keys, storage.fetch_full(r, keys)) if entry]
+                    pipe.multi()
+                    for key, entry in entries:
+                        storage.write(pipe, key, entry, fmt)
+                    pipe.execute()
+                    count += len(entries)
+                    break
+                except redis.WatchError:
+                    continue
+    return count
+
+def storage_report(sample=1000):
+    """storage.measure over up to sample anime"""
+    keys = []
+    for batch in _scan_batches():
+        keys += batch
+        if len(keys) >= sample:
+            break
+    return storage.measure(r, keys[:sample])
+
+@metrics.timed("redis_db.get_anime")
+def get_anime(key, details=False):
+    """
+    One anime by key, from the cache when it has it; None if there's no such anime.
+    The cache holds list-view fields only: details=True also loads synopsis, themes, studios and rating.
+    """
+    found = _records([key])
+    if not found:
+        return None
+    return found[0].replace(**get_details(key)) if details else found[0]
+
+@metrics.timed("redis_db.get_details")
+def get_details(key):
+    """The detail fields (storage.COLD_FIELDS) of one anime, {} if there's no such anime"""
+    full = storage.fetch_full(r, [key])[0]
+    if not full:
+        return {}
+    return {field: full.get(field, "") for field in storage.COLD_FIELDS}
+
+@metrics.timed("redis_db.get_distinct_genres")
 def get_distinct_genres():
+    """
+    Sorted genre names: from the cache once it's loaded, otherwise from the genre
+    indexes, so asking for them never loads the whole catalogue.
+    """
+    with _cache_lock:
+        loaded = _cache_version is not None
+    if loaded:
+        genres = set()
+        for anime in get_all_anime():
+            genres.update(anime.genres)
+        return sorted(genres)
+    return _indexed_genres()
+
+def _indexed_genres():
+    """Genre names as written (the index keys are lowercased), read off one anime per idx:genre:* set"""
+    prefix = GENRE_INDEX.format("")
+    index_keys = list(dict.fromkeys(r.scan_iter(match=prefix + "*", count=SCAN_BATCH_SIZE)))
+    pipe = r.pipeline(transaction=False)
+    for key in index_keys:
+        pipe.srandmember(key)
+    samples = [(key, anime_key) for key, anime_key in zip(index_keys, pipe.execute()) if anime_key]
+    for _, anime_key in samples:
+        pipe.hget(anime_key, "genres")
     genres = set()
-    for anime in get_all_anime():
-        genres.update(anime.get('genres', []))
+    for (key, _), stored in zip(samples, pipe.execute()):
+        lowered = key[len(prefix):]
+        genres.update(g.strip() for g in (stored or "").split(",") if g.strip().lower() == lowered)
     return sorted(genres)
 
 # NEW: Full search with title + genre + year range!
-def search_anime(query="", genre="", year_from=None, year_to=None):
+def _queue_title_lookup(pipe, query):
+    prefix = query.encode("utf-8")
+    pipe.zrangebylex(TITLE_INDEX, b"[" + prefix, b"[" + prefix + b"\xff")
+
+def _title_keys(entries):
+    return {e.rsplit("\x00", 1)[1] for e in entries}
+
+def _records(keys):
+    """Records for keys in the given order, from the cache or Redis for ones it hasn't seen yet"""
+    _sync_cache()
+    with _cache_lock:
+        found = {k: _cache[k] for k in keys if k in _cache}
+    missing = [k for k in keys if k not in found]
+    if missing:
+        found.update((anime["id"], anime) for anime in _load_batch(missing))
+    return [found[k] for k in keys if k in found]
+
+def _in_ranges(anime, ranges):
+    for field, (low, high) in ranges.items():
+        value = columnar._number(anime.get(field))
+        if low is not None and not value >= low:
+            return False
+        if high is not None and not value <= high:
+            return False
+    return True
+
+def _sort_key(sort_by):
+    if sort_by == "title":
+        return lambda a: a.sort_title
+    # Descending, unknown last
+    return lambda a: (a.get(sort_by) is None, -(a.get(sort_by) or 0), a.sort_title)
+
+@metrics.timed("redis_db.search_page")
+def search_page(query="", genre="", year_from=None, year_to=None, fulltext=False,
+                offset=0, limit=20, sort_by="title", ranges=None):
+    """
+    Like search_anime, but sorted and paginated for the caller.
+    Returns (the requested page of anime, total number of matches).
+    sort_by: one of SORT_FIELDS; full-text searches are always ordered by relevance.
+    Runs on the columnar snapshot when NumPy is installed, inside Redis otherwise.
+    """
+    if fulltext and query:
+        ranked = search_anime(query, genre, year_from, year_to, fulltext=True, ranges=ranges)
+        return ranked[offset:offset + limit], len(ranked)
+
+    if sort_by not in SORT_FIELDS:
+        raise ValueError(f"sort_by must be one of {SORT_FIELDS}")
+
+    snapshot = _current_snapshot()
+    if snapshot is not None:
+        mask = snapshot.mask(query, genre, year_from, year_to, ranges)
+        return snapshot.select(mask, sort_by, offset, limit)
+    if ranges:
+        # The Redis indexes have no score/episodes/duration ranges: filter and sort in Python
+        results = search_anime(query, genre, year_from, year_to, ranges=ranges)
+        results.sort(key=_sort_key(sort_by))
+        return results[offset:offset + limit], len(results)
+    sort_key = SORT_INDEX.format(sort_by)
+    descending = sort_by != "title"
+    query = normalize_title(query)
+    stop = offset + limit - 1
+
+    title_keys = None
+    if query:
+        pipe = r.pipeline(transaction=False)
+        _queue_title_lookup(pipe, query)
+        title_keys = _title_keys(pipe.execute()[0])
+        if not title_keys:
+            return [], 0
+
+    if not (title_keys or genre or year_from or year_to):
+        pipe = r.pipeline(transaction=False)
+        pipe.zcard(sort_key)
+        if descending:
+            pipe.zrevrange(sort_key, offset, stop)
+        else:
+            pipe.zrange(sort_key, offset, stop)
+        total, keys = pipe.execute()
+        return _records(keys), total
+
+    # Filters become zero-weight members of one ZINTERSTORE with the sort index
+    tmp = f"tmp:search:{uuid.uuid4().hex}"
+    weights = {sort_key: 1}
+    temp_keys = [tmp]
+    pipe = r.pipeline()
+    if genre:
+        weights[GENRE_INDEX.format(genre.lower())] = 0
+    if year_from or year_to:
+        years = tmp + ":year"
+        pipe.zrangestore(years, YEAR_INDEX, year_from or "-inf", year_to or "+inf", byscore=True)
+        weights[years] = 0
+        temp_keys.append(years)
+    if title_keys:
+        titles = tmp + ":title"
+        pipe.sadd(titles, *title_keys)
+        weights[titles] = 0
+        temp_keys.append(titles)
+    pipe.zinterstore(tmp, weights)
+    if descending:
+        pipe.zrevrange(tmp, offset, stop)
+    else:
+        pipe.zrange(tmp, offset, stop)
+    pipe.delete(*temp_keys)
+    *_, total, keys, _ = pipe.execute()
+    return _records(keys), total
+
+@metrics.timed("redis_db.search_anime")
+def search_anime(query="", genre="", year_from=None, year_to=None, fulltext=False, ranges=None):
     """
     Search anime with optional filters.
-    - query: string in title
+    - query: matched against the start of any word in the titles
     - genre: exact genre match (case insensitive)
     - year_from / year_to: int or None
+    - fulltext: rank query against titles, synopsis, themes and studios,
+      tolerating typos and romanisation differences (see text_index)
+    - ranges: {"score": (low, high), ...} over columnar.RANGE_FIELDS, either bound may be None
+    With NumPy the filters run as vectorized masks over a columnar snapshot of the cache,
+    otherwise they are answered from the idx:* indexes.
+    Full-text results come best match first, the rest sorted by title.
     """
-    results = []
-    query = query.lower() if query else ""
-    genre = genre.lower() if genre else ""
-
-    for anime in get_all_anime():
-        # Title match
-        title = anime.get("title", "").lower()
-        title_en = anime.get("title_english", "").lower()
-        title_jp = anime.get("title_japanese", "").lower()
-        if query and query not in title and query not in title_en and query not in title_jp:
-            continue
+    if not (fulltext and query):
+        snapshot = _current_snapshot()
+        if snapshot is not None:
+            return snapshot.select(snapshot.mask(query, genre, year_from, year_to, ranges))[0]
 
-        # Genre match
-        anime_genres = [g.lower() for g in anime.get("genres", [])]
-        if genre and genre not in anime_genres:
-            continue
+    ranked = None
+    if fulltext and query:
+        ranked = [key for key, _ in text_index.search(r, query, limit=FULLTEXT_LIMIT)]
+        query = ""
+    query = normalize_title(query)
+    genre = genre.lower() if genre else ""
 
-        # Year range match
-        try:
-            anime_year = int(anime.get("year")) if anime.get("year") else None
-        except:
-            anime_year = None
+    if not (query or genre or year_from or year_to or ranked is not None):
+        results = get_all_anime()
+    else:
+        pipe = r.pipeline(transaction=False)
+        if genre:
+            pipe.smembers(GENRE_INDEX.format(genre))
+        if year_from or year_to:
+            pipe.zrangebyscore(YEAR_INDEX, year_from or "-inf", year_to or "+inf")
+        if query:
+            _queue_title_lookup(pipe, query)
 
-        if year_from and (anime_year is None or anime_year < year_from):
-            continue
-        if year_to and (anime_year is None or anime_year > year_to):
-            continue
+        replies = pipe.execute()
+        if query:
+            replies[-1] = _title_keys(replies[-1])
+        if ranked is not None:
+            allowed = set.intersection(*(set(reply) for reply in replies)) if replies else None
+            keys = [k for k in ranked if allowed is None or k in allowed]
+        else:
+            keys = set.intersection(*(set(reply) for reply in replies))
 
-        results.append(anime)
+        _sync_cache()
+        with _cache_lock:
+            results = [_cache[k] for k in keys if k in _cache]
 
-    # Sort by title
-    results.sort(key=lambda x: x.get("title", "").lower())
+    if ranges:
+        results = [a for a in results if _in_ranges(a, ranges)]
+    if ranked is None:
+        # Sort by title
+        results.sort(key=lambda x: x.sort_title)
     return results
 
 
-def update_anime(key, data):
-    cleaned_data = {}
+def _clean_fields(data):
+    """Patch values as the strings a hash stores; None clears a field, genre lists are joined"""
+    cleaned = {}
     for k, v in data.items():
         if v is None:
-            cleaned_data[k] = "" 
-        elif k == "genres" and isinstance(v, list):
-            cleaned_data[k] = ",".join(v) 
-        elif isinstance(v, (str, int, float)):
-            cleaned_data[k] = str(v)
+            cleaned[k] = ""
+        elif k == "genres" and isinstance(v, (list, tuple)):
+            cleaned[k] = ",".join(v)
         else:
-            cleaned_data[k] = str(v)
-    if r.exists(key):
-        r.hset(key, mapping=cleaned_data)
-        return True
-    return False
+            cleaned[k] = str(v)
+    return cleaned
+
+def _record_versions(keys):
+    """
+    Catalogue version that last wrote each key: its meta:changes score, or the floor
+    for keys untouched since the last full reseed.
+    """
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.zscore(CHANGES_KEY, key)
+    pipe.get(CHANGES_FLOOR_KEY)
+    *scores, floor = pipe.execute()
+    return [int(score) if score is not None else int(floor or 0) for score in scores]
+
+def get_for_update(key):
+    """
+    (the full anime, the version it was last written at) to edit and save back through
+    update_many with that expected_version; (None, None) if there's no such anime.
+    The version is read first, so it is never newer than the fields.
+    """
+    version = _record_versions([key])[0]
+    anime = get_anime(key, details=True)
+    return (anime, version) if anime is not None else (None, None)
+
+@metrics.timed("redis_db.update_many")
+def update_many(patches, expected_version=None, batch_size=UPDATE_BATCH_SIZE):
+    """
+    Applies field patches to many anime, batch_size per WATCH/MULTI transaction.
+    patches: (key, {field: value}) pairs, or (key, fields, expected_version) to override
+    expected_version for that record. A record written after the version its patch is
+    based on is left alone and reported as a conflict, so concurrent editors can't
+    overwrite each other; a batch that some writer touches mid-way is simply redone.
+    Returns {key: "updated" | "unchanged" | "missing" | "conflict"}.
+    """
+    merged = {}   # key -> [fields, expected version]; later patches to the same key add to earlier ones
+    for key, fields, *expected in patches:
+        entry = merged.setdefault(key, [{}, expected_version])
+        entry[0].update(_clean_fields(fields))
+        if expected:
+            entry[1] = expected[0]
+    keys = list(merged)
+    outcomes = {}
+    with r.pipeline() as pipe:
+        for i in range(0, len(keys), batch_size):
+            batch = keys[i:i + batch_size]
+            while True:
+                try:
+                    pipe.watch(*batch)
+                    olds = storage.fetch_full(r, batch)
+                    versions = _record_versions(batch)
+                    results, writes = {}, {}
+                    for key, old, version in zip(batch, olds, versions):
+                        fields, expected = merged[key]
+                        if not old:
+                            results[key] = "missing"
+                        elif expected is not None and version > expected:
+                            results[key] = "conflict"
+                        elif all(old.get(k, "") == v for k, v in fields.items()):
+                            results[key] = "unchanged"
+                        else:
+                            results[key] = "updated"
+                            writes[key] = (old, {**old, **fields})
+                    if not writes:
+                        pipe.unwatch()
+                        break
+                    pipe.multi()
+                    for key, (old, new) in writes.items():
+                        unindex_anime(pipe, key, old)
+                        storage.write(pipe, key, new)
+                        index_anime(pipe, key, new)
+                    record_change(pipe, list(writes), op="update")
+                    version = pipe.execute()[-1]
+                    break
+                except redis.WatchError:
+                    continue
+            outcomes.update(results)
+            if writes:
+                _patch_cache(version, {key: _parse_anime(storage.hot(new), key) for key, (_, new) in writes.items()})
+    return outcomes
+
+@metrics.timed("redis_db.update_anime")
+def update_anime(key, data, expected_version=None):
+    """True if the anime exists and now holds data (see update_many for expected_version)"""
+    return update_many([(key, data)], expected_version)[key] in ("updated", "unchanged")
     
     
+@metrics.timed("redis_db.delete_anime")
 def delete_anime(anime_id):
-    print(anime_id)
-    return r.delete(anime_id) > 0
+    """
+    Deletes the anime and its index entries; False if there's no such anime. Watched like
+    update_many, so the entries removed are those of the fields actually being deleted.
+    """
+    with r.pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(anime_id)
+                old = storage.fetch_full(r, [anime_id])[0]
+                if not old:
+                    pipe.unwatch()
+                    return False
+                pipe.multi()
+                unindex_anime(pipe, anime_id, old)
+                pipe.delete(anime_id)
+                record_change(pipe, [anime_id], op="delete")
+                *_, deleted, version = pipe.execute()
+                break
+            except redis.WatchError:
+                continue
+    _patch_cache(version, {anime_id: None})
+    return deleted > 0
 
+@metrics.timed("redis_db.remove_genre")
 def remove_genre(selected_genre):
-    count = 0
-    all_anime = get_all_anime()
-    for anime in all_anime:
-        genres = anime.get("genres", [])
-        if selected_genre in genres:
-            new_genres = [g for g in genres if g != selected_genre]
-            update_anime(anime["id"], {"genres": new_genres})
-            count += 1
-    return count
\ No newline at end of file
+    """
+    Removes selected_genre from every anime that has it, in one atomic server-side
+    pass over the genre's index set. Returns the keys of the anime that changed.
+    """
+    version, affected = _remove_genre_script(
+        keys=[GENRE_INDEX.format(selected_genre.lower()), VERSION_KEY, CHANGES_KEY, FEED_KEY],
+        args=[selected_genre, selected_genre.lower(), FEED_MAXLEN])
+    if affected:
+        with _cache_lock:
+            changes = {}
+            for key in affected:
+                if key in _cache:
+                    anime = _cache[key]
+                    changes[key] = anime.replace(genres=[g for g in anime.genres if g != selected_genre])
+        _patch_cache(version, changes)
+    return affected
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Anime Redis maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild-indexes", help="rebuild the idx:* secondary indexes from the anime:* hashes")
+    migrate = sub.add_parser("migrate-storage", help="rewrite every anime hash in another storage format")
+    migrate.add_argument("--to", choices=storage.FORMATS, default="compact")
+    migrate.add_argument("--sample", type=int, default=1000, help="anime measured before and after")
+    export = sub.add_parser("export-snapshot", help="write the catalogue to a local snapshot file")
+    export.add_argument("--path", default=SNAPSHOT_PATH)
+    args = parser.parse_args()
+
+    if args.command == "rebuild-indexes":
+        print(f"✔️ Indexed {rebuild_indexes()} anime.")
+    elif args.command == "migrate-storage":
+        before = storage_report(args.sample)
+        print(f"✔️ Rewrote {migrate_storage(args.to)} anime as {args.to}.")
+        after = storage_report(args.sample)
+        print(f"Bytes per anime over {after['records']} anime{'':8}{'before':>10}{'after':>10}")
+        for name in ("memory_bytes", "stored_bytes", "list_view_bytes"):
+            print(f"{name:41}{str(before[name]):>10}{str(after[name]):>10}")
+        if args.to == "compact":
+            print(f"A list view used to HGETALL {before['stored_bytes']} bytes per anime, "
+                  f"it now HMGETs {after['list_view_bytes']}.")
+    elif args.command == "export-snapshot":
+        count = export_snapshot(args.path)
+        print(f"✔️ Wrote {count} anime (version {_cache_version}) to {args.path}, "
+              f"{os.path.getsize(args.path) / 1e6:.1f} MB.")
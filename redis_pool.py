@@ -0,0 +1,122 @@
+# redis_pool.py
+# The one Redis connection pool shared by redis_db, seed.py, the GUI's worker threads and api_server.
+# Settings come from the environment:
+#
+#   REDIS_URL                   redis://[:password@]host:port/db (or rediss://, unix://), overrides the four below
+#   REDIS_HOST / REDIS_PORT / REDIS_DB / REDIS_PASSWORD
+#   REDIS_MAX_CONNECTIONS       pool size; callers beyond it wait instead of opening more (default 32)
+#   REDIS_POOL_TIMEOUT          seconds to wait for a free connection (default 5)
+#   REDIS_SOCKET_TIMEOUT        seconds a command may take before it fails (default 5)
+#   REDIS_CONNECT_TIMEOUT       seconds to open a connection (default 2)
+#   REDIS_HEALTH_CHECK_INTERVAL idle seconds after which a connection is PINGed before reuse (default 15)
+#   REDIS_RETRIES               reconnect attempts after a connection error (default 3)
+#   REDIS_CLIENT_CACHE=1        RESP3 client-side caching of read replies, invalidated by the server
+import os
+import threading
+import time
+
+import redis
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
+
+import metrics
+
+URL = os.environ.get("REDIS_URL", "")
+HOST = os.environ.get("REDIS_HOST", "localhost")
+PORT = int(os.environ.get("REDIS_PORT") or 6379)
+DB = int(os.environ.get("REDIS_DB") or 0)
+PASSWORD = os.environ.get("REDIS_PASSWORD") or None
+MAX_CONNECTIONS = int(os.environ.get("REDIS_MAX_CONNECTIONS") or 32)
+POOL_TIMEOUT = float(os.environ.get("REDIS_POOL_TIMEOUT") or 5)
+SOCKET_TIMEOUT = float(os.environ.get("REDIS_SOCKET_TIMEOUT") or 5)
+CONNECT_TIMEOUT = float(os.environ.get("REDIS_CONNECT_TIMEOUT") or 2)
+HEALTH_CHECK_INTERVAL = int(os.environ.get("REDIS_HEALTH_CHECK_INTERVAL") or 15)
+RETRIES = int(os.environ.get("REDIS_RETRIES") or 3)
+CLIENT_CACHE = os.environ.get("REDIS_CLIENT_CACHE") == "1"
+CLIENT_CACHE_SIZE = 10_000
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class MeteredMixin:
+    """Counts round trips and commands per high-level operation (see metrics.timed)"""
+
+    def send_command(self, *args, **kwargs):
+        metrics.inc("redis_commands", metrics.current_op())
+        super().send_command(*args, **kwargs)
+
+    def pack_commands(self, commands):
+        commands = list(commands)
+        metrics.inc("redis_commands", metrics.current_op(), len(commands))
+        return super().pack_commands(commands)
+
+    def send_packed_command(self, command, check_health=True):
+        metrics.inc("redis_round_trips", metrics.current_op())
+        super().send_packed_command(command, check_health)
+
+
+def metered(connection_class):
+    """connection_class (plain, SSL or unix socket) with MeteredMixin's counting on top"""
+    return type(f"Metered{connection_class.__name__}", (MeteredMixin, connection_class), {})
+
+
+def connection_kwargs():
+    """
+    Connection settings, after REDIS_URL (if given) has filled in the address. For rediss://
+    and unix:// URLs that includes the connection_class to use.
+    """
+    kwargs = dict(
+        host=HOST, port=PORT, db=DB, password=PASSWORD,
+        decode_responses=True,
+        socket_timeout=SOCKET_TIMEOUT,
+        socket_connect_timeout=CONNECT_TIMEOUT,
+        socket_keepalive=True,
+        health_check_interval=HEALTH_CHECK_INTERVAL,
+        # A restarted server costs a few quick reconnect attempts, never an indefinite hang
+        retry=Retry(ExponentialBackoff(cap=1.0, base=0.05), RETRIES),
+        retry_on_error=[redis.ConnectionError, redis.TimeoutError],
+    )
+    if URL:
+        kwargs.update(redis.connection.parse_url(URL))
+        if "path" in kwargs:  # a unix socket has no host, port or TCP keepalive
+            del kwargs["host"], kwargs["port"], kwargs["socket_keepalive"]
+    if CLIENT_CACHE:
+        from redis.cache import CacheConfig
+        kwargs.update(protocol=3, cache_config=CacheConfig(max_size=CLIENT_CACHE_SIZE))
+    return kwargs
+
+
+def pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            kwargs = connection_kwargs()
+            connection_class = kwargs.pop("connection_class", redis.Connection)
+            _pool = redis.BlockingConnectionPool(
+                max_connections=MAX_CONNECTIONS, timeout=POOL_TIMEOUT,
+                connection_class=metered(connection_class) if metrics.ENABLED else connection_class,
+                **kwargs)
+        return _pool
+
+
+def client():
+    """A client on the shared pool; cheap, so every caller can take its own"""
+    return redis.Redis(connection_pool=pool())
+
+
+def health_check(r=None):
+    """{"ok": bool, "latency_ms": float, "error": str or None} for one PING over the pool"""
+    started = time.perf_counter()
+    try:
+        (r or client()).ping()
+        return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2), "error": None}
+    except redis.RedisError as e:
+        return {"ok": False, "latency_ms": None, "error": str(e)}
+
+
+def close():
+    """Drops every pooled connection, e.g. before a fork"""
+    with _pool_lock:
+        if _pool is not None:
+            _pool.disconnect()
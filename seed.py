@@ -1,10 +1,29 @@
 #!/usr/bin/env python3
 
+import asyncio
+import hashlib
+import os
 import requests
-import redis
 import json
 import time
 
+import redis
+
+import redis_db
+import redis_pool
+import storage
+
+BASE_URL = os.environ.get("JIKAN_BASE_URL", "https://api.jikan.moe/v4/anime?page={}")
+
+# Jikan's published limits: 3 requests per second and 60 per minute
+RATE_LIMITS = ((3, 1.0), (60, 60.0))
+MAX_IN_FLIGHT = 3
+MAX_RETRIES = 6
+MAX_PAGES = 9
+
+STAGING_PREFIX = "staging:"           # full reseeds are built here, then swapped in
+CHECKPOINT_KEY = "meta:seed:page"     # every page up to this one is saved
+HASHES_KEY = "meta:seed:hashes"       # anime key -> content hash of what the seeder last wrote
 
 
 def safe(value):
@@ -28,90 +47,267 @@ def getDuration(value):
 	return value[:value.find(" ")]
 
 
-def seed_anime(done_flag):
-		
-	# -----------------------------------------------------------
-	# CONNECT TO REDIS
-	# -----------------------------------------------------------
-	r = redis.Redis(
-		host="127.0.0.1",
-		port=6379,
-		password="",
-		decode_responses=True
+def build_entry(anime):
+	return {
+		"title": safe(anime.get("title")),
+		"title_english": safe(anime.get("title_english")),
+		"title_japanese": safe(anime.get("title_japanese")),
+		"synopsis": safe(anime.get("synopsis")),
+		"year": safe(anime.get("year")),
+		"episodes": safe(anime.get("episodes")),
+		"duration": safe(getDuration(anime.get("duration"))),
+		"score": safe(anime.get("score")),
+		"rating": safe(anime.get("rating")),  # age rating
+		"genres": safe([g["name"] for g in anime.get("genres", [])]),
+		"themes": safe([t["name"] for t in anime.get("themes", [])]),
+		"studios": safe([s["name"] for s in anime.get("studios", [])]),
+		"image": safe(anime.get("images", {}).get("jpg", {}).get("image_url"))
+	}
+
+
+class RateLimiter:
+	"""
+	Token buckets, one per (requests, seconds) limit.
+	A request goes out only once every bucket has a token to spare.
+	"""
+
+	def __init__(self, limits=RATE_LIMITS):
+		# [tokens, capacity, refill per second]
+		self.buckets = [[float(n), float(n), n / period] for n, period in limits]
+		self.updated = time.monotonic()
+		self.paused_until = 0.0
+		self.lock = asyncio.Lock()
+
+	def _refill(self):
+		now = time.monotonic()
+		elapsed = now - self.updated
+		self.updated = now
+		for bucket in self.buckets:
+			bucket[0] = min(bucket[1], bucket[0] + elapsed * bucket[2])
+		return now
+
+	async def acquire(self):
+		async with self.lock:
+			while True:
+				now = self._refill()
+				wait = self.paused_until - now
+				for tokens, _, rate in self.buckets:
+					wait = max(wait, (1 - tokens) / rate)
+				if wait <= 0:
+					for bucket in self.buckets:
+						bucket[0] -= 1
+					return
+				await asyncio.sleep(wait)
+
+	def pause(self, seconds):
+		"""Server told us to back off: nobody sends anything for a while"""
+		self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+		for bucket in self.buckets:
+			bucket[0] = 0.0
+
+
+def retry_delay(response, attempt):
+	"""Retry-After when the server sends one, exponential backoff otherwise"""
+	if response is not None:
+		try:
+			return max(float(response.headers.get("Retry-After", "")), 0.0)
+		except ValueError:
+			pass
+	return min(2 ** attempt, 30)
+
+
+async def fetch_page(session, limiter, in_flight, base_url, page):
+	for attempt in range(MAX_RETRIES):
+		response = None
+		async with in_flight:
+			await limiter.acquire()
+			try:
+				response = await asyncio.to_thread(session.get, base_url.format(page), timeout=15)
+				if response.status_code == 200:
+					return response.json()
+				print(f"❌ API Error {response.status_code} on page {page}, retrying...")
+			except (requests.RequestException, ValueError) as e:
+				print(f"⚠️ Request error on page {page}: {e}, retrying...")
+
+		delay = retry_delay(response, attempt)
+		if response is not None and response.status_code == 429:
+			limiter.pause(delay)
+		await asyncio.sleep(delay)
+
+	raise RuntimeError(f"page {page} failed after {MAX_RETRIES} attempts")
+
+
+def content_hash(entry):
+	return hashlib.sha1(json.dumps(entry, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def save_page(r, anime_list, prefix=""):
+	"""
+	Upserts one page of anime keyed by mal_id, skipping the ones whose content is unchanged.
+	With a prefix the page lands in the staging area and the live catalogue is left alone.
+	Returns how many anime were written.
+	"""
+	entries = {f"anime:{anime['mal_id']}": build_entry(anime) for anime in anime_list}
+	hashes = {key: content_hash(entry) for key, entry in entries.items()}
+	stored = r.hmget(prefix + HASHES_KEY, list(entries))
+	changed = [key for key, old in zip(entries, stored) if old != hashes[key]]
+	if not changed:
+		return 0
+
+	# The old versions are needed to drop their index entries. They are watched, so an edit
+	# landing between this read and the write makes us read again instead of leaving its entries behind.
+	with r.pipeline() as pipe:
+		while True:
+			try:
+				pipe.watch(*[prefix + key for key in changed])
+				olds = storage.fetch_full(r, [prefix + key for key in changed])
+				pipe.multi()
+				for key, old in zip(changed, olds):
+					if old:
+						redis_db.unindex_anime(pipe, key, old, prefix)
+					storage.write(pipe, prefix + key, entries[key])
+					redis_db.index_anime(pipe, key, entries[key], prefix)
+				pipe.hset(prefix + HASHES_KEY, mapping={key: hashes[key] for key in changed})
+				if not prefix:
+					redis_db.record_change(pipe, changed, op="seed")
+				pipe.execute()
+				return len(changed)
+			except redis.WatchError:
+				continue
+
+
+def delete_prefixed(r, pattern):
+	keys = list(r.scan_iter(match=pattern, count=redis_db.SCAN_BATCH_SIZE))
+	for i in range(0, len(keys), redis_db.SCAN_BATCH_SIZE):
+		r.delete(*keys[i:i + redis_db.SCAN_BATCH_SIZE])
+
+
+def swap_in_staging(r):
+	"""
+	Replaces the live catalogue, its indexes and seed hashes with the staged ones
+	in a single MULTI, so readers never see a half-seeded catalogue.
+	"""
+	staged = list(r.scan_iter(match=STAGING_PREFIX + "*", count=redis_db.SCAN_BATCH_SIZE))
+	live_names = {key[len(STAGING_PREFIX):] for key in staged}
+	stale = [key for key in r.scan_iter(match="anime:*", count=redis_db.SCAN_BATCH_SIZE) if key not in live_names]
+	stale += list(r.scan_iter(match="idx:*", count=redis_db.SCAN_BATCH_SIZE))
+
+	pipe = r.pipeline()
+	if stale:
+		pipe.delete(*stale)
+	for key in staged:
+		if key == STAGING_PREFIX + CHECKPOINT_KEY:
+			pipe.delete(key)
+		else:
+			pipe.rename(key, key[len(STAGING_PREFIX):])
+	redis_db.record_change(pipe, [], reset=True)
+	pipe.execute()
+	return len(stale)
+
+
+async def seed_pages(r, base_url, max_pages, concurrency, prefix="", limits=RATE_LIMITS):
+	session = requests.Session()
+	limiter = RateLimiter(limits)
+	in_flight = asyncio.Semaphore(concurrency)
+	checkpoint_lock = asyncio.Lock()
+
+	checkpoint = int(r.get(prefix + CHECKPOINT_KEY) or 0)
+	if checkpoint:
+		print(f"⏩ Resuming after page {checkpoint}")
+	first_page = checkpoint + 1
+	if max_pages and first_page > max_pages:
+		return 0
+
+	# The first page also tells us how many pages there are
+	print(f"➡️ Fetching page {first_page}...")
+	data = await fetch_page(session, limiter, in_flight, base_url, first_page)
+	last_page = data.get("pagination", {}).get("last_visible_page") or first_page
+	if max_pages:
+		last_page = min(last_page, max_pages)
+
+	done = set()
+
+	async def fetch_and_save(page, anime_list=None):
+		nonlocal checkpoint
+		if anime_list is None:
+			print(f"➡️ Fetching page {page}...")
+			anime_list = (await fetch_page(session, limiter, in_flight, base_url, page)).get("data", [])
+		saved = 0
+		if anime_list:
+			saved = await asyncio.to_thread(save_page, r, anime_list, prefix)
+			print(f"✔️ Page {page}: {saved} new or changed, {len(anime_list) - saved} unchanged")
+
+		async with checkpoint_lock:
+			done.add(page)
+			if checkpoint + 1 in done:
+				while checkpoint + 1 in done:
+					checkpoint += 1
+				await asyncio.to_thread(r.set, prefix + CHECKPOINT_KEY, checkpoint)
+		return saved
+
+	counts = await asyncio.gather(
+		fetch_and_save(first_page, data.get("data", [])),
+		*(fetch_and_save(page) for page in range(first_page + 1, last_page + 1))
 	)
+	session.close()
+	return sum(counts)
+
+
+def run_seed(r, base_url=BASE_URL, max_pages=MAX_PAGES, concurrency=MAX_IN_FLIGHT, incremental=False, limits=RATE_LIMITS):
+	"""
+	Full mode builds a fresh catalogue under STAGING_PREFIX and swaps it in at the end.
+	Incremental mode upserts straight into the live catalogue.
+	Both checkpoint finished pages, so an interrupted run picks up where it stopped.
+	Returns how many anime were written.
+	"""
+	prefix = "" if incremental else STAGING_PREFIX
+	if not incremental and not r.exists(STAGING_PREFIX + CHECKPOINT_KEY):
+		print("🧹 Clearing leftover staging keys...")
+		delete_prefixed(r, STAGING_PREFIX + "*")
 
-	print("🚀 Connected to Redis!")
-	
 	# -----------------------------------------------------------
-	# DELETE OLD ENTRIES
+	# FETCH FROM API
 	# -----------------------------------------------------------
-	print("🧹 Deleting old anime:* keys...")
-	old_keys = r.keys("anime:*")
-	if old_keys:
-		r.delete(*old_keys)
-		print(f"✔️ Deleted {len(old_keys)} previous anime entries.\n")
+	print("📡 Starting anime download...\n")
+	saved = asyncio.run(seed_pages(r, base_url, max_pages, concurrency, prefix, limits))
+
+	if incremental:
+		r.delete(CHECKPOINT_KEY)
+	else:
+		removed = swap_in_staging(r)
+		print(f"🔁 Swapped in the new catalogue ({removed} stale keys dropped).")
+	return saved
+
 
+def seed_anime(done_flag, base_url=BASE_URL, max_pages=MAX_PAGES, concurrency=MAX_IN_FLIGHT, incremental=False):
+		
 	# -----------------------------------------------------------
-	# FETCH FROM API
+	# CONNECT TO REDIS
 	# -----------------------------------------------------------
-	BASE_URL = "https://api.jikan.moe/v4/anime?page={}"
+	r = redis_pool.client()
 
-	page = 1
-	anime_id = 1
+	print("🚀 Connected to Redis!")
 
-	print("📡 Starting infinite anime download...\n")
+	saved = run_seed(r, base_url, max_pages, concurrency, incremental)
 
-	while True:
-		print(f"➡️ Fetching page {page}...")
-		try:
-			response = requests.get(BASE_URL.format(page))
-			if response.status_code != 200:
-				print(f"❌ API Error {response.status_code}, retrying...")
-				time.sleep(5)
-				continue
-			data = response.json()
-		except Exception as e:
-			print(f"⚠️ Request error: {e}, retrying...")
-			time.sleep(5)
-			continue
-
-		anime_list = data.get("data", [])
-
-		# STOP if the API has no more pages
-		if (not anime_list or page == 10):
-			print("\n🎉 FINISHED — API has no more anime.")
-			break
-
-		# -----------------------------------------------------------
-		# SAVE ANIME
-		# -----------------------------------------------------------
-		for anime in anime_list:
-
-				entry = {
-			"title": safe(anime.get("title")),
-			"title_english": safe(anime.get("title_english")),
-			"title_japanese": safe(anime.get("title_japanese")),
-			"synopsis": safe(anime.get("synopsis")),
-			"year": safe(anime.get("year")),
-			"episodes": safe(anime.get("episodes")),
-			"duration": safe(getDuration(anime.get("duration"))),
-			"score": safe(anime.get("score")),
-			"rating": safe(anime.get("rating")),  # age rating
-			"genres": safe([g["name"] for g in anime.get("genres", [])]),
-			"themes": safe([t["name"] for t in anime.get("themes", [])]),
-			"studios": safe([s["name"] for s in anime.get("studios", [])]),
-			"image": safe(anime.get("images", {}).get("jpg", {}).get("image_url"))
-				}
-
-				r.hset(f"anime:{anime_id}", mapping=entry)
-				print(f"✔️ Saved anime:{anime_id} → {entry['title'][:40]}")
-
-				anime_id += 1
-				#time.sleep(0.15)
-
-		page += 1
-		#time.sleep(0.5)
-	
 	#r.close()
-	print("\n🔥 All anime saved successfully!")
+	print(f"\n🔥 {saved} anime saved successfully!")
 	done_flag.set()
+
+
+if __name__ == "__main__":
+	import argparse
+	import threading
+
+	parser = argparse.ArgumentParser(description="Seed Redis with anime from the Jikan API")
+	parser.add_argument("--base-url", default=BASE_URL, help="page URL with a {} placeholder for the page number")
+	parser.add_argument("--max-pages", type=int, default=MAX_PAGES, help="0 fetches every page")
+	parser.add_argument("--concurrency", type=int, default=MAX_IN_FLIGHT)
+	parser.add_argument("--incremental", action="store_true", help="upsert into the live catalogue instead of rebuilding it")
+	parser.add_argument("--warm-images", action="store_true", help="then download and resize every cover into the image store")
+	args = parser.parse_args()
+
+	seed_anime(threading.Event(), args.base_url, args.max_pages, args.concurrency, args.incremental)
+	if args.warm_images:
+		import image_store
+		image_store.warm_catalogue()
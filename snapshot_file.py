@@ -0,0 +1,153 @@
+# snapshot_file.py
+# The list-view catalogue as one memory-mappable file, for a cold start without waiting on Redis.
+#
+#   magic "ANIMESNP" | u32 header length | JSON header | sections, each 8-byte aligned
+#
+# The header holds the format version, the catalogue version (meta:version) the file reflects
+# and the dataset (meta:dataset) that version belongs to, the record count, the distinct genres and where each section starts. Sections:
+#   number columns   float64 per record, NaN when unknown
+#   string columns   u32 offsets (count + 1) into a UTF-8 heap of the values, back to back
+#   orders           u32 record indices sorted for each sort field
+# Opening the file maps it and reads nothing else; records are decoded only when asked for.
+import json
+import math
+import mmap
+import os
+import struct
+import time
+from array import array
+
+from records import AnimeRecord
+
+PATH = os.environ.get("ANIME_SNAPSHOT", "catalogue.snapshot")
+MAGIC = b"ANIMESNP"
+FORMAT_VERSION = 1
+STRING_FIELDS = ("id", "title", "title_english", "title_japanese", "image", "duration", "genres")
+NUMBER_FIELDS = ("score", "year", "episodes")
+ALIGN = 8
+
+
+def _string_value(anime, field):
+    if field == "genres":
+        return ",".join(anime.genres)
+    return anime.get(field) or ""
+
+
+def write(path, records, version, orders, genres=(), dataset=None):
+    """
+    Writes records (AnimeRecords) to path, replacing any older file atomically.
+    orders: {sort field: record indices in that order}; genres: the distinct genre names.
+    """
+    sections = []
+    for field in NUMBER_FIELDS:
+        values = (anime.get(field) for anime in records)
+        sections.append((f"num:{field}", array("d", (math.nan if v is None else v for v in values)).tobytes()))
+    for field in STRING_FIELDS:
+        encoded = [_string_value(anime, field).encode("utf-8") for anime in records]
+        offsets = array("I", [0])
+        total = 0
+        for value in encoded:
+            total += len(value)
+            offsets.append(total)
+        sections.append((f"off:{field}", offsets.tobytes()))
+        sections.append((f"heap:{field}", b"".join(encoded)))
+    for field, order in orders.items():
+        sections.append((f"order:{field}", array("I", order).tobytes()))
+
+    directory = {}
+    position = 0
+    for name, data in sections:
+        directory[name] = [position, len(data)]
+        position += len(data) + (-len(data) % ALIGN)
+    header = json.dumps({"format": FORMAT_VERSION, "catalogue_version": version, "dataset": dataset,
+                         "count": len(records),
+                         "created": time.time(), "genres": list(genres), "sections": directory}).encode("utf-8")
+    prefix = MAGIC + struct.pack("<I", len(header)) + header
+    prefix += b"\0" * (-len(prefix) % ALIGN)
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(prefix)
+        for _, data in sections:
+            f.write(data)
+            f.write(b"\0" * (-len(data) % ALIGN))
+    os.replace(tmp, path)
+
+
+class MappedSnapshot:
+    """A snapshot file mapped read-only. Raises ValueError for files of another format."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.map)
+        try:
+            if bytes(view[:len(MAGIC)]) != MAGIC:
+                raise ValueError(f"{path} is not a catalogue snapshot")
+            (header_len,) = struct.unpack_from("<I", view, len(MAGIC))
+            start = len(MAGIC) + 4
+            header = json.loads(bytes(view[start:start + header_len]))
+            if header.get("format") != FORMAT_VERSION:
+                raise ValueError(f"{path} has snapshot format {header.get('format')}, expected {FORMAT_VERSION}")
+        except Exception:
+            view.release()
+            self.map.close()
+            raise
+        data_start = start + header_len + (-(start + header_len) % ALIGN)
+
+        def section(name, kind=None):
+            offset, length = header["sections"][name]
+            part = view[data_start + offset:data_start + offset + length]
+            return part.cast(kind) if kind else part
+
+        self.view = view
+        self.version = header["catalogue_version"]
+        self.dataset = header.get("dataset")  # None in files from before datasets had ids
+        self.count = header["count"]
+        self.created = header["created"]
+        self.genres = header.get("genres") or []
+        self.numbers = {f: section(f"num:{f}", "d") for f in NUMBER_FIELDS}
+        self.offsets = {f: section(f"off:{f}", "I") for f in STRING_FIELDS}
+        self.heaps = {f: section(f"heap:{f}") for f in STRING_FIELDS}
+        self.orders = {name[len("order:"):]: section(name, "I") for name in header["sections"]
+                       if name.startswith("order:")}
+
+    def __len__(self):
+        return self.count
+
+    def record(self, i):
+        fields = {}
+        for field in STRING_FIELDS:
+            offsets = self.offsets[field]
+            fields[field] = str(self.heaps[field][offsets[i]:offsets[i + 1]], "utf-8")
+        for field in NUMBER_FIELDS:
+            value = self.numbers[field][i]
+            fields[field] = None if math.isnan(value) else value
+        return AnimeRecord(**fields)
+
+    def records(self):
+        return [self.record(i) for i in range(self.count)]
+
+    def page(self, offset, limit, sort_by="title"):
+        """One page of records in sort_by order, decoding only those"""
+        order = self.orders.get(sort_by)
+        indices = order[offset:offset + limit] if order is not None else range(offset, min(offset + limit, self.count))
+        return [self.record(i) for i in indices]
+
+    def close(self):
+        for views in (self.numbers, self.offsets, self.heaps, self.orders):
+            for part in views.values():
+                part.release()
+        self.view.release()
+        self.map.close()
+
+
+def open_snapshot(path=PATH):
+    """Maps a snapshot file; None if there is none or it can't be used"""
+    try:
+        return MappedSnapshot(path)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ Ignoring snapshot {path}: {e}")
+        return None
@@ -0,0 +1,129 @@
+# storage.py
+# How one anime is laid out in its anime:<id> hash.
+#
+#   plain    every field its own string, as seed.build_entry makes them
+#   compact  the fields list views need stay plain strings (HOT_FIELDS); the long, rarely
+#            read ones (COLD_FIELDS) are packed into one compressed, version-tagged "detail" field
+#
+# Readers understand both, so a catalogue can be migrated while it is in use.
+# New writes use ANIME_STORAGE (default compact).
+import json
+import os
+import zlib
+
+# Cards, search filters, sorting and the title index read these
+HOT_FIELDS = ("title", "title_english", "title_japanese", "image", "score", "year", "episodes", "duration", "genres")
+# Only the details window and the full-text indexer do
+COLD_FIELDS = ("synopsis", "themes", "studios", "rating")
+DETAIL_FIELD = "detail"
+FORMATS = ("plain", "compact")
+FORMAT = os.environ.get("ANIME_STORAGE", "compact")
+
+# First byte of a detail blob says how the rest is encoded
+ZLIB_JSON_V1 = b"\x01"   # zlib-compressed JSON object of the cold fields
+ZLIB_LEVEL = 9
+
+
+def pack_detail(fields):
+    data = json.dumps({f: fields.get(f) or "" for f in COLD_FIELDS}, ensure_ascii=False, separators=(",", ":"))
+    return ZLIB_JSON_V1 + zlib.compress(data.encode("utf-8"), ZLIB_LEVEL)
+
+
+def unpack_detail(blob):
+    tag = blob[:1]
+    if tag == ZLIB_JSON_V1:
+        return json.loads(zlib.decompress(blob[1:]).decode("utf-8"))
+    raise ValueError(f"unknown detail encoding {tag!r}")
+
+
+def to_hash(entry, fmt=None):
+    """The hash fields to store for entry (a dict of strings) in format fmt"""
+    if (fmt or FORMAT) == "plain":
+        return {k: v for k, v in entry.items() if k != DETAIL_FIELD}
+    out = {k: v for k, v in entry.items() if k not in COLD_FIELDS and k != DETAIL_FIELD}
+    out[DETAIL_FIELD] = pack_detail(entry)
+    return out
+
+
+def write(pipe, key, entry, fmt=None):
+    """Queues replacing the whole hash at key with entry; fields of the other format are dropped"""
+    pipe.delete(key)
+    pipe.hset(key, mapping=to_hash(entry, fmt))
+
+
+def hot(entry):
+    return {k: entry[k] for k in HOT_FIELDS if k in entry}
+
+
+def _present(fields, values):
+    found = {f: v for f, v in zip(fields, values) if v is not None}
+    return found or None
+
+
+def queue_hot(pipe, key):
+    """One reply per key: the hot fields, in either format"""
+    pipe.hmget(key, HOT_FIELDS)
+
+
+def hot_from_reply(values):
+    """The hot fields from a queue_hot reply, or None if there's no such anime"""
+    return _present(HOT_FIELDS, values)
+
+
+def queue_full(pipe, key):
+    """
+    Two replies per key: the plain fields, then the raw detail blob.
+    pipe must not be a MULTI: EXEC would try to decode the blob as text.
+    """
+    from redis.client import NEVER_DECODE  # here, so api_client can use the field lists without redis
+    pipe.hmget(key, HOT_FIELDS + COLD_FIELDS)
+    pipe.execute_command("HGET", key, DETAIL_FIELD, **{NEVER_DECODE: True})
+
+
+def full_from_replies(values, blob):
+    entry = _present(HOT_FIELDS + COLD_FIELDS, values)
+    if blob is not None:
+        entry = {**(entry or {}), **unpack_detail(blob)}
+    return entry
+
+
+def fetch_full(client, keys):
+    """Every field of each key, unpacked, in one round trip; None for keys that don't exist"""
+    pipe = client.pipeline(transaction=False)
+    for key in keys:
+        queue_full(pipe, key)
+    replies = pipe.execute()
+    return [full_from_replies(replies[i], replies[i + 1]) for i in range(0, len(replies), 2)]
+
+
+def measure(client, keys):
+    """
+    Average bytes per anime over keys: Redis's own MEMORY USAGE (None where the server
+    doesn't report it), what the hash holds, and what a list view and a full read transfer.
+    """
+    from redis.client import NEVER_DECODE
+    raw = client.pipeline(transaction=False)
+    for key in keys:
+        raw.execute_command("HGETALL", key, **{NEVER_DECODE: True})
+        raw.execute_command("MEMORY USAGE", key)
+        raw.execute_command("HMGET", key, *HOT_FIELDS, **{NEVER_DECODE: True})
+    replies = raw.execute(raise_on_error=False)
+    stored = memory = listed = 0
+    memory_known = True
+    for i in range(0, len(replies), 3):
+        fields, usage, hot_values = replies[i:i + 3]
+        if isinstance(fields, list):  # RESP2 hands back a flat list, RESP3 a dict
+            fields = dict(zip(fields[::2], fields[1::2]))
+        stored += sum(len(f) + len(v) for f, v in fields.items())
+        listed += sum(len(v) for v in hot_values if v is not None)
+        if isinstance(usage, int):
+            memory += usage
+        else:
+            memory_known = False
+    n = max(len(keys), 1)
+    return {
+        "records": len(keys),
+        "memory_bytes": round(memory / n) if memory_known else None,
+        "stored_bytes": round(stored / n),
+        "list_view_bytes": round(listed / n),
+    }
@@ -0,0 +1,201 @@
+# text_index.py
+# Inverted index over titles, synopsis, themes and studios, kept in Redis next to the idx:* keys.
+# Queries are tokenised the same way as documents, expanded with prefix/typo matches
+# on title words, and ranked with BM25.
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+TERM_KEY = "idx:fts:term:{}"    # hash: anime key -> weighted term frequency
+GRAM_KEY = "idx:fts:gram:{}"    # set of title terms containing this trigram, for fuzzy lookups
+LENGTH_KEY = "idx:fts:len"      # hash: anime key -> weighted document length
+STATS_KEY = "idx:fts:stats"     # hash: docs, length
+
+# A title hit counts three synopsis hits
+FIELD_WEIGHTS = {"title": 3, "title_english": 3, "title_japanese": 3,
+                 "studios": 2, "themes": 2, "synopsis": 1}
+FUZZY_FIELDS = ("title", "title_english", "title_japanese")
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by for from had has have he her his in into is it its
+of on or she so than that the their them then there they this to was we were what when
+which while who will with you your
+""".split())
+
+# Weight of a query term matched exactly, as a prefix, or within a small edit distance
+EXACT, PREFIX, FUZZY = 1.0, 0.7, 0.5
+MAX_EXPANSIONS = 10
+K1, B = 1.2, 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff]+")
+_LONG_VOWELS = (("ou", "o"), ("oo", "o"), ("uu", "u"), ("aa", "a"), ("ii", "i"), ("ee", "e"))
+
+
+def normalize(text):
+    """NFKC + casefold, Latin accents stripped (Tōkyō -> tokyo), katakana folded to hiragana"""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    out = []
+    for ch in unicodedata.normalize("NFKD", text):
+        if unicodedata.combining(ch) and out and ord(out[-1]) < 0x250:
+            continue
+        if "\u30a1" <= ch <= "\u30f6":
+            ch = chr(ord(ch) - 0x60)
+        out.append(ch)
+    return unicodedata.normalize("NFC", "".join(out))
+
+
+def _fold_latin(word):
+    # Romanisations disagree on long vowels: kyoujin / kyojin / kyôjin all become kyojin
+    for long, short in _LONG_VOWELS:
+        word = word.replace(long, short)
+    return word
+
+
+def tokenize(text):
+    tokens = []
+    for run in _TOKEN_RE.findall(normalize(text)):
+        if run.isascii():
+            if len(run) > 1 and run not in STOPWORDS:
+                tokens.append(_fold_latin(run))
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            # No spaces in Japanese: index overlapping character bigrams
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def trigrams(term):
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def document_terms(anime):
+    """Returns (weighted term frequencies, title terms eligible for fuzzy matching)"""
+    tf = Counter()
+    fuzzy = set()
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in tokenize(anime.get(field)):
+            tf[token] += weight
+            if field in FUZZY_FIELDS and token.isascii():
+                fuzzy.add(token)
+    return tf, fuzzy
+
+
+def index_document(pipe, key, anime, prefix=""):
+    tf, fuzzy = document_terms(anime)
+    if not tf:
+        return
+    for term, count in tf.items():
+        pipe.hset(prefix + TERM_KEY.format(term), key, count)
+    grams = defaultdict(list)
+    for term in fuzzy:
+        for gram in trigrams(term):
+            grams[gram].append(term)
+    for gram, terms in grams.items():
+        pipe.sadd(prefix + GRAM_KEY.format(gram), *terms)
+    length = sum(tf.values())
+    pipe.hset(prefix + LENGTH_KEY, key, length)
+    pipe.hincrby(prefix + STATS_KEY, "docs", 1)
+    pipe.hincrby(prefix + STATS_KEY, "length", length)
+
+
+def unindex_document(pipe, key, anime, prefix=""):
+    # Trigram sets keep their terms: a stale term just has no postings left
+    tf, _ = document_terms(anime)
+    if not tf:
+        return
+    for term in tf:
+        pipe.hdel(prefix + TERM_KEY.format(term), key)
+    pipe.hdel(prefix + LENGTH_KEY, key)
+    pipe.hincrby(prefix + STATS_KEY, "docs", -1)
+    pipe.hincrby(prefix + STATS_KEY, "length", -sum(tf.values()))
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance, giving up (returning limit + 1) once it must exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+def _expansions(token, candidates):
+    """Picks the vocabulary terms a query token should match, with their weights"""
+    found = {token: EXACT}
+    limit = 1 if len(token) <= 5 else 2
+    grams = trigrams(token)
+    overlap = {term: len(grams & trigrams(term)) for term in candidates if term != token}
+    for term in sorted(overlap, key=overlap.get, reverse=True):
+        if len(found) > MAX_EXPANSIONS:
+            break
+        if term.startswith(token):
+            found[term] = PREFIX
+        elif len(token) >= 4 and edit_distance(token, term, limit) <= limit:
+            found[term] = FUZZY
+    return found
+
+
+def search(client, text, limit=50):
+    """
+    Ranks anime keys for a free-text query. Returns [(key, score), ...], best first.
+    Costs three pipelined round trips, independent of catalogue size.
+    """
+    tokens = list(dict.fromkeys(tokenize(text)))
+    if not tokens:
+        return []
+
+    # 1. Candidate vocabulary for typo/prefix matching, from the title trigram sets
+    fuzzy_tokens = [t for t in tokens if t.isascii() and len(t) >= 3]
+    pipe = client.pipeline(transaction=False)
+    for token in fuzzy_tokens:
+        pipe.sunion(*[GRAM_KEY.format(g) for g in trigrams(token)])
+    candidates = dict(zip(fuzzy_tokens, pipe.execute()))
+    expanded = {t: _expansions(t, candidates.get(t, ())) for t in tokens}
+
+    # 2. Postings of every expanded term, plus corpus statistics
+    terms = sorted({term for exp in expanded.values() for term in exp})
+    pipe = client.pipeline(transaction=False)
+    for term in terms:
+        pipe.hgetall(TERM_KEY.format(term))
+    pipe.hgetall(STATS_KEY)
+    *postings, stats = pipe.execute()
+    postings = dict(zip(terms, postings))
+    docs = max(int(stats.get("docs", 0)), 1)
+    avg_length = max(int(stats.get("length", 0)), 1) / docs
+
+    matched = set().union(*(p.keys() for p in postings.values()))
+    if not matched:
+        return []
+
+    # 3. Document lengths for BM25 normalisation
+    matched = list(matched)
+    lengths = dict(zip(matched, (float(n or avg_length) for n in client.hmget(LENGTH_KEY, matched))))
+
+    scores = Counter()
+    for token, exp in expanded.items():
+        best = {}
+        for term, weight in exp.items():
+            posting = postings.get(term) or {}
+            if not posting:
+                continue
+            idf = math.log(1 + (docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for key, tf in posting.items():
+                tf = float(tf)
+                norm = tf + K1 * (1 - B + B * lengths[key] / avg_length)
+                score = weight * idf * tf * (K1 + 1) / norm
+                if score > best.get(key, 0.0):
+                    best[key] = score
+        # A document scores each query token once, through its best-matching variant
+        for key, score in best.items():
+            scores[key] += score
+
+    return scores.most_common(limit)